@@ -0,0 +1,100 @@
+import os
+import re
+import sys
+import glob
+import json
+import time
+import argparse
+import yaml
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scraper import ExtractionPlan, PageDocument, find_emails, find_phones
+
+def legacy_select(soup, selectors):
+    # Mirrors the per-selector extraction scrape_page used before the single-pass plan
+    results = []
+    for selector in selectors:
+        if selector.startswith('//'):
+            continue
+        if selector.startswith('regex:'):
+            pattern = selector.split('regex:', 1)[1].strip()
+            results.extend(re.findall(pattern, str(soup)))
+        else:
+            for element in soup.select(selector):
+                if 'meta' in selector:
+                    results.append(element.get('content', '').strip())
+                elif element.text.strip():
+                    results.append(element.text.strip())
+    return ", ".join(filter(None, set(results)))
+
+def legacy_extract(html, selectors, level):
+    soup = BeautifulSoup(html, 'html.parser')
+    page_text = soup.get_text()
+    fields = {
+        'name': legacy_select(soup, selectors.get('company_name', [])),
+        'email': find_emails(page_text),
+        'phone': find_phones(page_text)
+    }
+    if level in ('medium', 'advanced'):
+        fields['description'] = legacy_select(soup, selectors.get('description', []))
+        fields['address'] = legacy_select(soup, selectors.get('address', []))
+        for link in legacy_select(soup, selectors.get('social', [])).split(", "):
+            if 'linkedin.com' in link: fields['linkedin'] = link
+            if 'twitter.com' in link: fields['twitter'] = link
+            if 'facebook.com' in link: fields['facebook'] = link
+        for field in ('email', 'phone'):
+            fields[f"selector_{field}"] = legacy_select(soup, selectors.get(field, []))
+    return fields
+
+def plan_extract(plan, html, level):
+    doc = PageDocument(html)
+    fields = plan.extract(doc, level)
+    if level in ('medium', 'advanced'):
+        for field in ('email', 'phone'):
+            fields[f"selector_{field}"] = plan.select(doc, field)
+    return fields
+
+def time_per_page(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare legacy and single-pass per-page extraction time')
+    parser.add_argument('--config', default=os.path.join(ROOT, 'config.yaml'))
+    parser.add_argument('--fixtures', default=os.path.join(ROOT, 'benchmarks', 'fixtures', '*.html'))
+    parser.add_argument('--level', choices=['basic', 'medium', 'advanced'], default='medium')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        selectors = yaml.safe_load(f).get('selectors', {})
+    plan = ExtractionPlan(selectors)
+
+    results = []
+    for path in sorted(glob.glob(args.fixtures)):
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        legacy_ms = time_per_page(lambda: legacy_extract(html, selectors, args.level), args.iterations)
+        plan_ms = time_per_page(lambda: plan_extract(plan, html, args.level), args.iterations)
+        results.append({
+            'fixture': os.path.basename(path),
+            'bytes': len(html.encode('utf-8')),
+            'legacy_ms': round(legacy_ms, 2),
+            'plan_ms': round(plan_ms, 2),
+            'speedup': round(legacy_ms / plan_ms, 2) if plan_ms else None
+        })
+        print(f"{os.path.basename(path):<24} {len(html) // 1024:>6} KB  "
+              f"legacy {legacy_ms:8.2f} ms  plan {plan_ms:8.2f} ms  x{legacy_ms / plan_ms:.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+WORDS = ("cloud platform analytics secure scalable enterprise customers data teams build deliver "
+         "global partners innovation software services integrated automation reliable growth").split()
+SECTIONS = ['about', 'contact', 'team', 'products', 'careers', 'news', 'pricing', 'partners']
+# Subresources every page references, which a browser downloads unless lean loading blocks them
+ASSETS = {
+    '/hero.jpg': ('image/jpeg', 250 * 1024),
+    '/brand.woff2': ('font/woff2', 80 * 1024)
+}
+
+def paragraph(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+class Site:
+    def __init__(self, index, rng, js_fraction, sizes):
+        self.index = index
+        self.name = f"Company {index} {rng.choice(['Labs', 'Systems', 'Group', 'Technologies'])}"
+        self.slug = f"company{index}"
+        self.requires_js = rng.random() < js_fraction
+        self.paragraphs = rng.choice(sizes)
+        self.sections = rng.sample(SECTIONS, rng.randint(2, len(SECTIONS)))
+        self.phone = f"{rng.randint(200, 989)}-{rng.randint(200, 989)}-{rng.randint(1000, 9999)}"
+        self.rng = rng
+        self.pages = {'/': self.page('Home')}
+        for section in self.sections:
+            self.pages[f'/{section}'] = self.page(section.capitalize())
+
+    def page(self, title):
+        rng = self.rng
+        nav = "".join(f'<li><a href="/{section}">{section}</a></li>' for section in self.sections)
+        body = "".join(f"<p>{paragraph(rng, 60)}</p>" for _ in range(self.paragraphs))
+        content = f"""<img src="/hero.jpg" alt="" width="1200" height="400">
+<h1>{self.name}</h1>
+<nav><ul>{nav}</ul></nav>
+<main><section><h2>{title}</h2>{body}</section>
+<address>{self.index} Market Street, Springfield</address>
+<p>Contact <a href="mailto:info@{self.slug}.example">info@{self.slug}.example</a> or call {self.phone}.</p>
+<p><a href="https://www.linkedin.com/company/{self.slug}">LinkedIn</a>
+<a href="https://twitter.com/{self.slug}">Twitter</a></p></main>"""
+        head = f"""<head><title>{self.name} - {title}</title>
+<meta name="description" content="{self.name}: {paragraph(rng, 12)}">
+<meta property="og:title" content="{self.name}">
+<style>@font-face {{ font-family: Brand; src: url(/brand.woff2) format('woff2'); }} body {{ font-family: Brand; }}</style>
+</head>"""
+        if self.requires_js:
+            # Content only exists after the script runs, as on single-page-app sites
+            return f"""<!DOCTYPE html><html>{head}<body><div id="app"></div>
+<noscript>You need to enable JavaScript to run this app.</noscript>
+<script>document.getElementById('app').innerHTML = {json.dumps(content)};</script></body></html>"""
+        return f"<!DOCTYPE html><html>{head}<body>{content}</body></html>"
+
+# Company sites, a Bing-style results page and search API, and a BuiltWith stand-in, all on loopback.
+# Each site gets its own 127.0.x.y address so per-domain rate limiting and crawl
+# limits treat them as separate domains, as real sites would be.
+class SyntheticWeb:
+    def __init__(self, sites=40, js_fraction=0.1, sizes=(2, 10, 40, 150), latency_ms=20, seed=7):
+        rng = random.Random(seed)
+        self.sites = [Site(index, rng, js_fraction, sizes) for index in range(1, sites + 1)]
+        self.latency = latency_ms / 1000.0
+        self.servers = []
+        self.site_urls = []
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def handler(self, site):
+        web = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_HEAD(self):
+                self.respond(head=True)
+
+            def do_GET(self):
+                self.respond()
+
+            def respond(self, head=False):
+                with web.lock:
+                    web.requests += 1
+                if web.latency:
+                    time.sleep(web.latency)
+                parsed = urlparse(self.path)
+                if site is None:
+                    status, content_type, body = web.service(parsed)
+                elif parsed.path in ASSETS:
+                    content_type, size = ASSETS[parsed.path]
+                    status, body = 200, bytes(size)
+                else:
+                    page = site.pages.get(parsed.path.rstrip('/') or '/')
+                    status, content_type, body = (200, 'text/html', page) if page else (404, 'text/html', 'Not found')
+                data = body if isinstance(body, bytes) else body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type if isinstance(body, bytes) else f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                if not head:
+                    self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def service(self, parsed):
+        params = parse_qs(parsed.query)
+        if parsed.path == '/search':
+            start = int(params.get('first', ['0'])[0])
+            results = "".join(
+                f'<li class="b_algo"><h2><a href="{url}">{site.name}</a></h2></li>'
+                for site, url in list(zip(self.sites, self.site_urls))[start:start + 10]
+            )
+            return 200, 'text/html', f'<html><body><ol id="b_results">{results}</ol></body></html>'
+        if parsed.path == '/v7.0/search':
+            # Bing Web Search API shape
+            start = int(params.get('offset', ['0'])[0])
+            count = int(params.get('count', ['10'])[0])
+            return 200, 'application/json', json.dumps({
+                'webPages': {'value': [
+                    {'name': site.name, 'url': url}
+                    for site, url in list(zip(self.sites, self.site_urls))[start:start + count]
+                ]}
+            })
+        if parsed.path == '/v19/api.json':
+            lookups = params.get('LOOKUP', [''])[0].split(',')
+            return 200, 'application/json', json.dumps({
+                'Results': [
+                    {'Lookup': domain, 'Result': {'Paths': [{'Technologies': [{'Name': 'nginx'}, {'Name': 'React'}]}]}}
+                    for domain in lookups
+                ],
+                'Errors': []
+            })
+        return 404, 'text/plain', 'Not found'
+
+    def serve(self, address, site):
+        server = ThreadingHTTPServer((address, 0), self.handler(site))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        return f"http://{address}:{server.server_address[1]}"
+
+    def start(self):
+        self.service_url = self.serve('127.0.0.2', None)
+        for site in self.sites:
+            self.site_urls.append(self.serve(f'127.0.{10 + site.index // 250}.{site.index % 250 + 1}', site) + '/')
+        return self
+
+    @property
+    def search_url(self):
+        return self.service_url + '/search?q={query}&first={start}'
+
+    @property
+    def search_api_url(self):
+        return self.service_url + '/v7.0/search?q={query}&offset={start}&count={count}'
+
+    @property
+    def builtwith_url(self):
+        return self.service_url + '/v19/api.json'
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    web = SyntheticWeb().start()
+    print(f"Search: {web.search_url}\nSearch API: {web.search_api_url}\nBuiltWith: {web.builtwith_url}")
+    for url in web.site_urls:
+        print(url)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        web.stop()
@@ -0,0 +1,267 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+from datetime import datetime
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fixture_server import SyntheticWeb
+
+# Politeness delays are zeroed so runs measure the scraper rather than the sleeps
+BASE_OVERRIDES = {
+    'rate_limit': 0,
+    'min_delay': 0,
+    'max_delay': 0,
+    'proxies': [],
+    'max_pages_per_domain': 50
+}
+
+CONFIGURATIONS = {
+    'http-1-inline': {'config': {'fetch_mode': 'http', 'workers': 1, 'extraction_processes': 0}},
+    'http-4-inline': {'config': {'fetch_mode': 'http', 'workers': 4, 'extraction_processes': 0}},
+    'http-4-pool': {'config': {'fetch_mode': 'http', 'workers': 4, 'extraction_processes': 4}},
+    'http-8-pool-advanced': {'config': {'fetch_mode': 'http', 'workers': 8, 'extraction_processes': 4},
+                             'level': 'advanced'},
+    'search-http': {'config': {'fetch_mode': 'http', 'workers': 4, 'extraction_processes': 4,
+                               'search_backend': 'http'}, 'query': 'synthetic companies'},
+    'search-api': {'config': {'fetch_mode': 'http', 'workers': 4, 'extraction_processes': 4,
+                              'search_backend': 'api'}, 'query': 'synthetic companies'},
+    # These need Chrome: JS-only sites escalate to the browser, and the browser search backend renders in it
+    'auto-4-pool': {'config': {'fetch_mode': 'auto', 'workers': 4, 'extraction_processes': 4}, 'browser': True},
+    'auto-4-pool-full-load': {'config': {'fetch_mode': 'auto', 'workers': 4, 'extraction_processes': 4,
+                                         'lean_load': False}, 'browser': True},
+    'search-advanced': {'config': {'fetch_mode': 'auto', 'workers': 4, 'extraction_processes': 4},
+                        'query': 'synthetic companies', 'level': 'advanced', 'browser': True}
+}
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))]
+
+def run_child(spec):
+    # Runs one configuration in this (fresh) process so RSS and CPU are attributable to it
+    workdir = tempfile.mkdtemp(prefix='scraper-bench-')
+    with open(os.path.join(ROOT, 'config.yaml')) as f:
+        config = yaml.safe_load(f)
+    config.update(BASE_OVERRIDES)
+    config.update(spec['config'])
+    config.update({
+        'search_url': spec['search_url'],
+        'search_api_url': spec['search_api_url'],
+        'builtwith_url': spec['builtwith_url'],
+        'journal_path': os.path.join(workdir, 'jobs.db'),
+        'cache_path': os.path.join(workdir, 'cache.db')
+    })
+    with open(os.path.join(workdir, 'config.yaml'), 'w') as f:
+        yaml.safe_dump(config, f)
+    os.chdir(workdir)
+
+    import scraper
+    latencies = []
+
+    class TimedScraper(scraper.CompanyScraper):
+        # Per-page latency: from the start of a page's scrape to its record being stored
+        def new_record(self, url):
+            self.page_started = getattr(self, 'page_started', {})
+            self.page_started[url] = time.perf_counter()
+            return super().new_record(url)
+
+        def store_record(self, company_data, error=False):
+            started = self.page_started.pop(company_data['url'], None)
+            if started is not None:
+                latencies.append(time.perf_counter() - started)
+            return super().store_record(company_data, error)
+
+    scraper.CompanyScraper = TimedScraper
+    scraper.logger.setLevel('WARNING')
+
+    args = argparse.Namespace(
+        query=spec.get('query'),
+        urls=None if spec.get('query') else " ".join(spec['urls']),
+        level=spec.get('level', 'medium'),
+        pages=spec.get('pages', 2),
+        depth=spec.get('depth', 1),
+        format='csv',
+        output=os.path.join(workdir, 'output'),
+        selectors=None,
+        workers=None,
+        cache_ttl=None,
+        no_cache=True,
+        resume=None
+    )
+    cpu_before = os.times()
+    started = time.perf_counter()
+    status = scraper.run_scraping_job(args)
+    elapsed = time.perf_counter() - started
+    cpu_after = os.times()
+
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    pages = len(latencies)
+    cpu = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system) + \
+        (cpu_after.children_user - cpu_before.children_user) + \
+        (cpu_after.children_system - cpu_before.children_system)
+    return {
+        'status': status.get('status'),
+        'message': status.get('message'),
+        'pages': pages,
+        'errors': status.get('errors'),
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 2) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        # ru_maxrss is in kilobytes on Linux; children covers the extraction processes
+        'peak_rss_mb': round(own.ru_maxrss / 1024, 1),
+        'peak_child_rss_mb': round(children.ru_maxrss / 1024, 1),
+        'cpu_seconds': round(cpu, 2),
+        'fetch_stats': status.get('fetch_stats'),
+        'stages': status.get('metrics', {}).get('stages')
+    }
+
+def probe_browser():
+    # Starts and quits one browser; the reason it could not start, or None
+    workdir = tempfile.mkdtemp(prefix='scraper-bench-')
+    with open(os.path.join(ROOT, 'config.yaml')) as f:
+        config = yaml.safe_load(f)
+    config.update(BASE_OVERRIDES)
+    with open(os.path.join(workdir, 'config.yaml'), 'w') as f:
+        yaml.safe_dump(config, f)
+    os.chdir(workdir)
+
+    import scraper
+    crawler = scraper.CompanyScraper(use_cache=False)
+    try:
+        crawler.driver
+        return None
+    except Exception as e:
+        return str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+    finally:
+        crawler.close()
+
+def browser_unavailable(args):
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--probe-browser'],
+                          capture_output=True, text=True, timeout=args.timeout)
+    lines = [line for line in proc.stdout.splitlines() if line.startswith('{')]
+    if proc.returncode != 0 or not lines:
+        return (proc.stderr.strip().splitlines() or ["browser probe crashed"])[-1]
+    return json.loads(lines[-1])['error']
+
+def run_configuration(name, spec, web, args):
+    spec = dict(spec)
+    spec.update({
+        'urls': web.site_urls,
+        'search_url': web.search_url,
+        'search_api_url': web.search_api_url,
+        'builtwith_url': web.builtwith_url,
+        'depth': args.depth,
+        'pages': (len(web.site_urls) + 9) // 10
+    })
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', json.dumps(spec)],
+        capture_output=True, text=True, timeout=args.timeout
+    )
+    lines = [line for line in proc.stdout.splitlines() if line.startswith('{')]
+    if proc.returncode != 0 or not lines:
+        return {'configuration': name, 'status': 'crashed', 'message': proc.stderr.strip().splitlines()[-1:]}
+    return dict(configuration=name, **json.loads(lines[-1]))
+
+def lean_load_savings(results):
+    # The same crawl with and without lean loading; the difference is what blocking saved per browser page
+    by_name = {result['configuration']: result for result in results}
+    lean, full = by_name.get('auto-4-pool'), by_name.get('auto-4-pool-full-load')
+    if not lean or not full:
+        return None
+    lean_browser = (lean.get('fetch_stats') or {}).get('browser') or {}
+    full_browser = (full.get('fetch_stats') or {}).get('browser') or {}
+    if not lean_browser.get('count') or not full_browser.get('count'):
+        return None
+    return {
+        'browser_pages': lean_browser['count'],
+        'avg_bytes': {'lean': lean_browser.get('avg_bytes', 0), 'full': full_browser.get('avg_bytes', 0)},
+        'bytes_saved_per_page': full_browser.get('avg_bytes', 0) - lean_browser.get('avg_bytes', 0),
+        'seconds_saved_per_page': round(full_browser['avg_latency'] - lean_browser['avg_latency'], 3),
+        'blocked_per_page': lean_browser.get('avg_blocked', 0)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end run_scraping_job benchmark against a local synthetic web')
+    parser.add_argument('--configs', type=str, help='Comma separated configuration names (default: all)')
+    parser.add_argument('--sites', type=int, default=40)
+    parser.add_argument('--js-fraction', type=float, default=0.1)
+    parser.add_argument('--latency-ms', type=int, default=20, help='Simulated server latency per request')
+    parser.add_argument('--depth', type=int, default=1, help='Crawl depth below each home page')
+    parser.add_argument('--timeout', type=int, default=900, help='Seconds allowed per configuration')
+    parser.add_argument('--no-browser', action='store_true', help='Skip configurations that need Chrome')
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    parser.add_argument('--child', type=str, help=argparse.SUPPRESS)
+    parser.add_argument('--probe-browser', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(json.loads(args.child))))
+        return
+    if args.probe_browser:
+        print(json.dumps({'error': probe_browser()}))
+        return
+
+    names = args.configs.split(',') if args.configs else list(CONFIGURATIONS)
+    unknown = [name for name in names if name not in CONFIGURATIONS]
+    if unknown:
+        parser.error(f"Unknown configurations: {', '.join(unknown)}")
+    if args.no_browser:
+        names = [name for name in names if not CONFIGURATIONS[name].get('browser')]
+    # Without Chrome, escalated pages would be counted as fast errors, so those runs are skipped
+    unavailable = browser_unavailable(args) if any(CONFIGURATIONS[name].get('browser') for name in names) else None
+
+    js_fraction = 0.0 if args.no_browser else args.js_fraction
+    web = SyntheticWeb(sites=args.sites, js_fraction=js_fraction, latency_ms=args.latency_ms).start()
+    results = []
+    try:
+        for name in names:
+            if unavailable and CONFIGURATIONS[name].get('browser'):
+                result = {'configuration': name, 'status': 'skipped', 'message': f"needs Chrome: {unavailable}"}
+            else:
+                result = run_configuration(name, CONFIGURATIONS[name], web, args)
+            results.append(result)
+            if not result.get('pages'):
+                print(f"{name:<24} {result['status']}: {result.get('message')}")
+                continue
+            print(f"{name:<24} {result['pages']:>5} pages  {result['errors'] or 0:>3} errors  "
+                  f"{result['pages_per_sec']:>7.2f} pages/s  "
+                  f"p50 {result['p50_ms']:>8.1f} ms  p99 {result['p99_ms']:>8.1f} ms  "
+                  f"rss {result['peak_rss_mb']:>6.1f} MB  cpu {result['cpu_seconds']:>6.2f} s")
+    finally:
+        web.stop()
+
+    savings = lean_load_savings(results)
+    if savings:
+        print(f"lean load: {savings['bytes_saved_per_page'] / 1024:.1f} KB and "
+              f"{savings['seconds_saved_per_page'] * 1000:.0f} ms saved per browser page "
+              f"({savings['avg_bytes']['lean'] / 1024:.1f} vs {savings['avg_bytes']['full'] / 1024:.1f} KB, "
+              f"{savings['blocked_per_page']} requests blocked)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'generated_at': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'corpus': {'sites': args.sites, 'js_fraction': js_fraction,
+                           'latency_ms': args.latency_ms, 'depth': args.depth},
+                'results': results,
+                'lean_load': savings
+            }, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import os
+import re
+import sys
+import glob
+import json
+import time
+import argparse
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scraper import EMAIL_PATTERN, PHONE_PATTERN, PageDocument, RegexScanner
+
+def build_corpus(pattern, sizes):
+    fixtures = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding='utf-8') as f:
+            fixtures.append(f.read())
+    blob = "\n".join(fixtures)
+    corpus = []
+    for size in sizes:
+        html = (blob * (size // len(blob) + 1))[:size]
+        corpus.append((f"{size // 1024} KB", html, PageDocument(html).text))
+    return corpus
+
+def legacy_scan(html, text, regex_selectors):
+    # Patterns rebuilt per call and every regex: selector scanned on its own, as before
+    emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
+    phones = re.findall(r'(\+\d{1,2}\s?)?(\(\d{3}\)|\d{3})[\s.-]?\d{3}[\s.-]?\d{4}\b', text)
+    custom = [re.findall(pattern, html) for _, pattern in regex_selectors]
+    return emails, phones, custom
+
+def time_call(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-call, precompiled and fused regex scanning')
+    parser.add_argument('--config', default=os.path.join(ROOT, 'config.yaml'))
+    parser.add_argument('--fixtures', default=os.path.join(ROOT, 'benchmarks', 'fixtures', '*.html'))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[256 * 1024, 1024 * 1024, 4 * 1024 * 1024])
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        selectors = yaml.safe_load(f).get('selectors', {})
+    regex_selectors = [
+        (selector_type, selector.split('regex:', 1)[1].strip())
+        for selector_type, type_selectors in selectors.items()
+        for selector in type_selectors
+        if selector.startswith('regex:')
+    ]
+    contacts = [('email', EMAIL_PATTERN), ('phone', PHONE_PATTERN)]
+    scanners = {
+        'separate': (RegexScanner(contacts, fuse=False), RegexScanner(regex_selectors, fuse=False)),
+        'fused': (RegexScanner(contacts), RegexScanner(regex_selectors))
+    }
+
+    results = []
+    for label, html, text in build_corpus(args.fixtures, args.sizes):
+        row = {
+            'page': label,
+            'legacy_ms': round(time_call(lambda: legacy_scan(html, text, regex_selectors), args.iterations), 2)
+        }
+        for name, (text_scanner, html_scanner) in scanners.items():
+            row[f"{name}_ms"] = round(time_call(
+                lambda: (text_scanner.scan(text), html_scanner.scan(html)), args.iterations
+            ), 2)
+        results.append(row)
+        print(f"{label:>8}  legacy {row['legacy_ms']:9.2f} ms  separate {row['separate_ms']:9.2f} ms  "
+              f"fused {row['fused_ms']:9.2f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import statistics
+import subprocess
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGE = ("<html><head><title>Acme</title></head><body><h1>Acme Corp</h1><p>"
+        + "Acme builds reliable software for teams. " * 20
+        + "Mail sales@acme.example or call 555-123-4567.</p></body></html>").encode()
+
+IMPORT_CODE = """
+import time
+started = time.perf_counter()
+import scraper
+print((time.perf_counter() - started) * 1000)
+"""
+
+FIRST_REQUEST_CODE = """
+import sys
+import scraper
+crawler = scraper.CompanyScraper(use_cache=False)
+html, doc, tier = crawler.fetch_page(sys.argv[1])
+crawler.close()
+print(tier)
+"""
+
+class FirstRequestServer:
+    def __init__(self):
+        self.first_request = None
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if server.first_request is None:
+                    server.first_request = time.perf_counter()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Length', str(len(PAGE)))
+                self.end_headers()
+                self.wfile.write(PAGE)
+
+            def do_HEAD(self):
+                self.do_GET()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def workdir():
+    # Each run gets its own config, log and cache files so nothing is shared or left behind
+    path = tempfile.mkdtemp(prefix='scraper-startup-')
+    shutil.copy(os.path.join(ROOT, 'config.yaml'), path)
+    return path
+
+def environment():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    return env
+
+def import_ms():
+    path = workdir()
+    try:
+        out = subprocess.run([sys.executable, '-c', IMPORT_CODE], cwd=path, env=environment(),
+                             capture_output=True, text=True, check=True)
+        return float(out.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+def first_request_ms():
+    # From process launch to the first byte of HTTP traffic reaching the target site
+    server = FirstRequestServer()
+    path = workdir()
+    try:
+        started = time.perf_counter()
+        out = subprocess.run([sys.executable, '-c', FIRST_REQUEST_CODE, server.url], cwd=path,
+                             env=environment(), capture_output=True, text=True, timeout=300)
+        if server.first_request is None:
+            raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "no request made")
+        return (server.first_request - started) * 1000
+    finally:
+        server.stop()
+        shutil.rmtree(path, ignore_errors=True)
+
+def dashboard_ms():
+    # From launching `scraper.py --web` to the first answered /health request
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    path = workdir()
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, 'scraper.py'), '--web', '--host', '127.0.0.1',
+                             '--port', str(port)], cwd=path, env=environment(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        import requests
+        while time.perf_counter() - started < 60:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except requests.ConnectionError:
+                time.sleep(0.01)
+        raise RuntimeError("dashboard did not answer within 60s")
+    finally:
+        proc.terminate()
+        proc.wait()
+        shutil.rmtree(path, ignore_errors=True)
+
+def summarize(func, runs):
+    samples = []
+    for _ in range(runs):
+        try:
+            samples.append(func())
+        except Exception as e:
+            return {'error': str(e)}
+    return {'median_ms': round(statistics.median(samples), 1), 'min_ms': round(min(samples), 1), 'runs': runs}
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import time and time-to-first-request')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    results = {
+        'import': summarize(import_ms, args.runs),
+        'first_request': summarize(first_request_ms, args.runs),
+        'dashboard_first_request': summarize(dashboard_ms, args.runs)
+    }
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name:<26} failed: {result['error']}")
+        else:
+            print(f"{name:<26} median {result['median_ms']:>8.1f} ms  min {result['min_ms']:>8.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
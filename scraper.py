@@ -1,52 +1,68 @@
 import os
 import re
+import codecs
 import time
 import random
 import argparse
 import logging
 from logging.handlers import RotatingFileHandler
 import yaml
-import pandas as pd
 import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
-from urllib.parse import urlparse, urljoin
-from tldextract import extract
-from flask import Flask, render_template, jsonify, request
+from requests.adapters import HTTPAdapter
+import lxml.html
+from lxml import etree
+from cssselect import HTMLTranslator
+from urllib.parse import urlparse, urljoin, urlencode, parse_qsl, quote_plus
 import threading
+import queue
+import heapq
+import itertools
+from functools import lru_cache
+import copy
+from collections import deque
+import asyncio
+import multiprocessing
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import contextmanager
 import json
+import csv
+import uuid
+import sqlite3
+import socket
 from datetime import datetime
 import sys
-from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
-# Initialize Flask app first
-app = Flask(__name__, template_folder='templates')
+# pandas, selenium's webdriver, webdriver_manager, tldextract, Flask and APScheduler
+# are imported where they are first used: most runs need only some of them, and
+# together they account for most of the time `import scraper` used to take.
 
-# Configure logging after imports
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 
-file_handler = RotatingFileHandler(
-    'scraper.log', maxBytes=5*1024*1024, backupCount=3
-)
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+def configure_logging(path='scraper.log'):
+    # Called by the entry points rather than at import, so importing the module has no side effects
+    if getattr(configure_logging, 'done', False):
+        return
+    configure_logging.done = True
+    logger.setLevel(logging.INFO)
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+    file_handler = RotatingFileHandler(
+        path, maxBytes=5*1024*1024, backupCount=3
+    )
+    file_handler.setFormatter(formatter)
+    logger.addHandler(file_handler)
 
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
 
 # Global variables
-current_job = None
-scraping_status = {
+scheduler = None
+scheduler_lock = threading.Lock()
+shared_queue = None
+proxy_manager = None
+IDLE_STATUS = {
     "status": "idle",
     "start_time": None,
     "end_time": None,
@@ -55,34 +71,1957 @@ scraping_status = {
     "errors": 0
 }
 
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class Metrics:
+    # Prometheus-style counters and latency histograms; a job's registry also feeds the process-wide one
+    def __init__(self, parent=None, buckets=LATENCY_BUCKETS):
+        self.parent = parent
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram['counts'][i] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+        if self.parent is not None:
+            self.parent.observe(name, value, **labels)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+        if self.parent is not None:
+            self.parent.inc(name, amount, **labels)
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('scraper_stage_seconds', time.perf_counter() - started, stage=stage)
+
+    def quantile(self, histogram, q):
+        # Upper bound of the bucket holding the q-th observation, as Prometheus would estimate it. Samples
+        # past the top bucket clamp to its bound: an infinite estimate would serialize as invalid JSON
+        target = q * histogram['count']
+        seen = 0
+        for bound, count in zip(self.buckets, histogram['counts']):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.buckets[-1]
+
+    def summary(self):
+        with self.lock:
+            histograms = {key: dict(value, counts=list(value['counts'])) for key, value in self.histograms.items()}
+            counters = dict(self.counters)
+        stages = {}
+        for (name, labels), histogram in sorted(histograms.items()):
+            if name != 'scraper_stage_seconds' or not histogram['count']:
+                continue
+            stages[dict(labels)['stage']] = {
+                'count': histogram['count'],
+                'total_seconds': round(histogram['sum'], 3),
+                'avg_seconds': round(histogram['sum'] / histogram['count'], 4),
+                'p50_seconds': self.quantile(histogram, 0.5),
+                'p99_seconds': self.quantile(histogram, 0.99)
+            }
+        totals = {}
+        for (name, labels), value in sorted(counters.items()):
+            label = ",".join(f"{k}={v}" for k, v in labels)
+            totals.setdefault(name, {})[label or 'total'] = value
+        return {'stages': stages, 'counters': totals}
+
+    def render(self):
+        def format_labels(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+            
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        for (name, labels), histogram in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram['counts']):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{name}_sum{format_labels(labels)} {histogram['sum']:.6f}")
+            lines.append(f"{name}_count{format_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+METRICS = Metrics()
+
+def error_category(error):
+    if isinstance(error, (TimeoutException, requests.Timeout, asyncio.TimeoutError)):
+        return 'timeout'
+    if isinstance(error, requests.ConnectionError):
+        return 'connection'
+    if isinstance(error, WebDriverException):
+        return 'webdriver'
+    if isinstance(error, requests.HTTPError):
+        return 'http_status'
+    if isinstance(error, (etree.ParserError, ValueError)):
+        return 'parse'
+    return 'other'
+
+class DomainRateLimiter:
+    def __init__(self, rate_limit, min_delay=0, max_delay=0, burst=1):
+        # rate_limit is requests per minute to any one registered domain
+        self.rate = rate_limit / 60.0 if rate_limit else None
+        self.burst = burst
+        self.min_delay = min_delay
+        self.max_delay = max(min_delay, max_delay)
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def reserve(self, domain):
+        with self.lock:
+            now = time.monotonic()
+            bucket = self.buckets.setdefault(domain, {
+                'tokens': float(self.burst),
+                'updated': now,
+                'next_allowed': now
+            })
+            start = max(now, bucket['next_allowed'])
+            if self.rate:
+                tokens = min(self.burst, bucket['tokens'] + (now - bucket['updated']) * self.rate)
+                if tokens < 1:
+                    start = max(start, now + (1 - tokens) / self.rate)
+                bucket['tokens'] = tokens - 1
+                bucket['updated'] = now
+            bucket['next_allowed'] = start + random.uniform(self.min_delay, self.max_delay)
+            return start - now
+
+    def release(self, domain):
+        # Polite spacing is measured from when the previous request finished
+        with self.lock:
+            bucket = self.buckets.get(domain)
+            if bucket:
+                pause = random.uniform(self.min_delay, self.max_delay)
+                bucket['next_allowed'] = max(bucket['next_allowed'], time.monotonic() + pause)
+
+    def wait(self, domain):
+        delay = self.reserve(domain)
+        if delay > 0:
+            time.sleep(delay)
+        return max(delay, 0)
+
+    async def acquire(self, domain):
+        delay = self.reserve(domain)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return max(delay, 0)
+
+    @contextmanager
+    def throttle(self, domain):
+        self.wait(domain)
+        try:
+            yield
+        finally:
+            self.release(domain)
+
+class ResponseCache:
+    def __init__(self, path='cache.db', ttl=3600, max_bytes=500 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                tier TEXT,
+                fetched_at REAL,
+                accessed_at REAL,
+                size INTEGER
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self.conn.commit()
+        self.size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, url):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, tier, fetched_at FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if not row:
+                return None
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+        return dict(zip(('body', 'etag', 'last_modified', 'tier', 'fetched_at'), row))
+
+    def fresh(self, url):
+        # Whether get() would return a fresh entry, without reading the body
+        with self.lock:
+            row = self.conn.execute("SELECT fetched_at FROM responses WHERE url = ?", (url,)).fetchone()
+        return bool(row) and self.is_fresh({'fetched_at': row[0]})
+
+    def is_fresh(self, entry, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        return ttl > 0 and time.time() - entry['fetched_at'] < ttl
+
+    def put(self, url, body, etag=None, last_modified=None, tier='http'):
+        now = time.time()
+        size = len(body.encode('utf-8'))
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, tier, now, now, size)
+            )
+            self.size += size - (old[0] if old else 0)
+            self.evict()
+            self.conn.commit()
+
+    def refresh(self, url):
+        with self.lock:
+            now = time.time()
+            self.conn.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, url)
+            )
+            self.conn.commit()
+
+    def evict(self):
+        # Least recently used entries go first once the cache outgrows max_bytes
+        while self.size > self.max_bytes:
+            rows = self.conn.execute(
+                "SELECT url, size FROM responses ORDER BY accessed_at LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self.size = 0
+                return
+            for url, size in rows:
+                if self.size <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self.size -= size
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+BLOCK_STATUSES = {403, 407, 429, 503}
+BLOCK_MARKERS = ('unusual traffic', 'verify you are human', 'are you a robot', 'security check',
+                 'cf-chl-', 'captcha-delivery', 'px-captcha')
+
+def looks_blocked(status, body=''):
+    if status in BLOCK_STATUSES:
+        return True
+    # Challenge pages are small; a full page merely mentioning a captcha widget is not a block
+    if body and len(body) < 50000:
+        body = body.lower()
+        return any(marker in body for marker in BLOCK_MARKERS)
+    return False
+
+META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?\s*([\w.:-]+)', re.I)
+
+def decode_html(response):
+    # requests assumes ISO-8859-1 for text/html without a charset; the page's own
+    # <meta charset> says better, and failing that the bytes are sniffed
+    content_type = response.headers.get('Content-Type', '').lower()
+    if 'html' in content_type and 'charset' not in content_type:
+        match = META_CHARSET.search(response.content[:4096])
+        encoding = None
+        if match:
+            try:
+                encoding = codecs.lookup(match.group(1).decode('ascii')).name
+            except LookupError:
+                pass
+        response.encoding = encoding or response.apparent_encoding
+    return response
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))]
+
+class ProxyManager:
+    def __init__(self, proxies, failure_threshold=3, backoff=30, max_backoff=1800, window=200):
+        self.failure_threshold = max(1, failure_threshold)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.window = window
+        self.lock = threading.Lock()
+        self.health = {}
+        self.update(proxies)
+
+    def update(self, proxies):
+        with self.lock:
+            for proxy in proxies or []:
+                self.health.setdefault(proxy, {
+                    'attempts': 0, 'successes': 0, 'failures': 0, 'blocks': 0,
+                    'streak': 0, 'quarantines': 0, 'quarantined_until': 0.0,
+                    'latencies': deque(maxlen=self.window)
+                })
+            self.proxies = list(proxies or [])
+
+    def __bool__(self):
+        return bool(self.proxies)
+
+    def score(self, health):
+        # Smoothed so untried proxies get a fair share, and slow ones are tried proportionally less
+        success = (health['successes'] + 1) / (health['attempts'] + 2)
+        blocked = health['blocks'] / (health['attempts'] + 2)
+        latency = percentile(health['latencies'], 50) or 1.0
+        return max(success * (1 - blocked), 0.01) / (1 + latency)
+
+    def choose(self, exclude=()):
+        if not self.proxies:
+            return None
+        now = time.time()
+        with self.lock:
+            candidates = [p for p in self.proxies if p not in exclude] or list(self.proxies)
+            available = [p for p in candidates if self.health[p]['quarantined_until'] <= now]
+            if not available:
+                # Everything is quarantined; the one closest to release is the best bet
+                return min(candidates, key=lambda p: self.health[p]['quarantined_until'])
+            weights = [self.score(self.health[p]) for p in available]
+        return random.choices(available, weights=weights)[0]
+
+    def requests_proxies(self, proxy):
+        # Both schemes, so plain-HTTP fetches credited to the proxy really go through it
+        return {'http': proxy, 'https': proxy} if proxy else None
+
+    def record(self, proxy, ok, latency=None, blocked=False):
+        if proxy is None:
+            return
+        with self.lock:
+            health = self.health.get(proxy)
+            if health is None:
+                return
+            health['attempts'] += 1
+            if latency is not None:
+                health['latencies'].append(latency)
+            if ok and not blocked:
+                health['successes'] += 1
+                health['streak'] = 0
+                health['quarantines'] = 0
+                return
+            health['blocks' if blocked else 'failures'] += 1
+            health['streak'] += 1
+            if health['streak'] < self.failure_threshold:
+                return
+            delay = min(self.backoff * 2 ** health['quarantines'], self.max_backoff)
+            health['quarantined_until'] = time.time() + delay
+            health['quarantines'] += 1
+            health['streak'] = 0
+        logging.warning(f"Quarantined proxy {proxy} for {delay}s")
+
+    def snapshot(self):
+        now = time.time()
+        with self.lock:
+            stats = {}
+            for proxy, health in self.health.items():
+                attempts = health['attempts']
+                latencies = [round(latency, 3) for latency in health['latencies']]
+                stats[proxy] = {
+                    'attempts': attempts,
+                    'success_rate': round(health['successes'] / attempts, 3) if attempts else None,
+                    'block_rate': round(health['blocks'] / attempts, 3) if attempts else None,
+                    'failures': health['failures'],
+                    'p50_latency': percentile(latencies, 50),
+                    'p90_latency': percentile(latencies, 90),
+                    'p99_latency': percentile(latencies, 99),
+                    'quarantined_for': max(0, round(health['quarantined_until'] - now)),
+                    'score': round(self.score(health), 4)
+                }
+        return stats
+
+class BuiltWithClient:
+    def __init__(self, api_key, base_url='https://api.builtwith.com/v19/api.json', session=None,
+                 cache=None, ttl=7 * 86400, workers=4, batch_size=16, user_agents=None, proxies=None,
+                 metrics=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.session = session or requests.Session()
+        self.cache = cache
+        self.ttl = ttl
+        self.batch_size = max(1, batch_size)
+        self.user_agents = user_agents or []
+        self.proxies = proxies if isinstance(proxies, ProxyManager) else ProxyManager(proxies)
+        self.metrics = metrics or Metrics()
+        self.lock = threading.Lock()
+        self.lookups = {}
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.stats = {'requests': 0, 'domains': 0, 'cache_hits': 0}
+
+    def lookup(self, domain):
+        # Every domain is looked up at most once per run
+        with self.lock:
+            future = self.lookups.get(domain)
+            if future is None:
+                future = self.pool.submit(self.fetch_one, domain)
+                self.lookups[domain] = future
+        return future
+
+    def prefetch(self, domains):
+        pending = []
+        with self.lock:
+            for domain in dict.fromkeys(filter(None, domains)):
+                if domain not in self.lookups:
+                    self.lookups[domain] = Future()
+                    pending.append(domain)
+                    
+        batch = []
+        for domain in pending:
+            tech = self.cached(domain)
+            if tech is not None:
+                self.lookups[domain].set_result(tech)
+            else:
+                batch.append(domain)
+        for i in range(0, len(batch), self.batch_size):
+            self.pool.submit(self.fetch_batch, batch[i:i + self.batch_size])
+
+    def cached(self, domain):
+        if not self.cache:
+            return None
+        entry = self.cache.get(f"builtwith:{domain}")
+        if entry and self.cache.is_fresh(entry, self.ttl):
+            with self.lock:
+                self.stats['cache_hits'] += 1
+            return self.parse(json.loads(entry['body'])).get(domain, "")
+        return None
+
+    def fetch_one(self, domain):
+        tech = self.cached(domain)
+        if tech is not None:
+            return tech
+        return self.request([domain]).get(domain, "")
+
+    def fetch_batch(self, domains):
+        results = {}
+        try:
+            results = self.request(domains)
+        finally:
+            for domain in domains:
+                self.lookups[domain].set_result(results.get(domain, ""))
+
+    def request(self, domains):
+        proxy = self.proxies.choose()
+        started = time.time()
+        try:
+            headers = {'User-Agent': random.choice(self.user_agents)} if self.user_agents else {}
+            with self.metrics.timer('builtwith'):
+                response = self.session.get(
+                    self.base_url,
+                    params={'KEY': self.api_key, 'LOOKUP': ",".join(domains)},
+                    headers=headers,
+                    proxies=self.proxies.requests_proxies(proxy),
+                    timeout=15
+                )
+            self.proxies.record(proxy, True, time.time() - started, looks_blocked(response.status_code))
+            with self.lock:
+                self.stats['requests'] += 1
+                self.stats['domains'] += len(domains)
+            if response.status_code != 200:
+                self.metrics.inc('scraper_errors_total', stage='builtwith', category='http_status')
+                logging.warning(f"BuiltWith API returned status {response.status_code}")
+                return {}
+            data = response.json()
+        except requests.RequestException as e:
+            self.proxies.record(proxy, False, time.time() - started)
+            self.metrics.inc('scraper_errors_total', stage='builtwith', category=error_category(e))
+            logging.error(f"BuiltWith API error: {str(e)}")
+            return {}
+        except Exception as e:
+            logging.error(f"BuiltWith API error: {str(e)}")
+            return {}
+            
+        if len(domains) == 1:
+            for result in data.get('Results', []):
+                result.setdefault('Lookup', domains[0])
+        if self.cache:
+            for result in data.get('Results', []):
+                if result.get('Lookup'):
+                    self.cache.put(f"builtwith:{result['Lookup']}", json.dumps({'Results': [result]}), tier='api')
+        return self.parse(data)
+
+    def parse(self, data):
+        stacks = {}
+        for result in data.get('Results', []):
+            tech = []
+            for path in result.get('Result', {}).get('Paths', []):
+                for tech_group in path.get('Technologies', []):
+                    tech.append(tech_group.get('Name', ''))
+            stacks[result.get('Lookup', '')] = ", ".join(filter(None, tech))
+        return stacks
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'(?:\+\d{1,2}\s?)?(?:\(\d{3}\)|\d{3})[\s.-]?\d{3}[\s.-]?\d{4}\b')
+MAX_SCAN_CHARS = 2000000
+
+def find_emails(text):
+    if not text:
+        return ""
+    emails = EMAIL_PATTERN.findall(text[:MAX_SCAN_CHARS])
+    return ", ".join(sorted(set(emails))) if emails else ""
+
+def find_phones(text):
+    if not text:
+        return ""
+    phones = [phone.strip() for phone in PHONE_PATTERN.findall(text[:MAX_SCAN_CHARS])]
+    return ", ".join(set(phones)) if phones else ""
+
+class RegexScanner:
+    def __init__(self, patterns, fuse=True, max_chars=MAX_SCAN_CHARS):
+        # patterns is a list of (key, pattern) pairs; matches are grouped by key
+        self.max_chars = max_chars
+        self.fused = None
+        self.groups = {}
+        self.separate = []
+        
+        fusable = []
+        for key, pattern in patterns:
+            compiled = re.compile(pattern) if isinstance(pattern, str) else pattern
+            if fuse and self.can_fuse(compiled.pattern):
+                fusable.append((key, compiled))
+            else:
+                self.separate.append((key, compiled))
+                
+        if fusable:
+            try:
+                alternatives = [f"(?P<_p{i}>{compiled.pattern})" for i, (_, compiled) in enumerate(fusable)]
+                self.fused = re.compile("|".join(alternatives))
+                for i, (key, compiled) in enumerate(fusable):
+                    index = self.fused.groupindex[f"_p{i}"]
+                    # Mirror re.findall: a single capturing group yields that group
+                    self.groups[f"_p{i}"] = (key, index + 1 if compiled.groups == 1 else index)
+            except re.error as e:
+                logging.warning(f"Could not fuse patterns, scanning separately: {str(e)}")
+                self.fused = None
+                self.separate.extend(fusable)
+
+    def can_fuse(self, pattern):
+        # Back-references and global inline flags do not survive renumbering into one alternation
+        return not re.search(r'\\[1-9]|\(\?P=|^\(\?[aiLmsux]+\)', pattern)
+
+    def scan(self, buffer):
+        matches = {}
+        if not buffer or not (self.fused or self.separate):
+            return matches
+        if len(buffer) > self.max_chars:
+            logging.debug(f"Scanning first {self.max_chars} of {len(buffer)} characters")
+            buffer = buffer[:self.max_chars]
+            
+        if self.fused:
+            for match in self.fused.finditer(buffer):
+                key, group = self.groups[match.lastgroup]
+                matches.setdefault(key, []).append(match.group(group))
+        for key, compiled in self.separate:
+            for match in compiled.finditer(buffer):
+                value = match.group(1) if compiled.groups == 1 else match.group(0)
+                matches.setdefault(key, []).append(value)
+        return matches
+
+class PageDocument:
+    def __init__(self, html):
+        self.html = html or ""
+        try:
+            self.root = lxml.html.document_fromstring(self.html)
+        except ValueError:
+            # Documents with an XML encoding declaration must be parsed as bytes
+            self.root = lxml.html.document_fromstring(self.html.encode('utf-8'))
+        except etree.ParserError:
+            self.root = lxml.html.document_fromstring("<html></html>")
+        self._text = None
+        self.regex_matches = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.root.text_content()
+        return self._text
+
+    def links(self):
+        return self.root.xpath('//a/@href')
+
+class ExtractionPlan:
+    def __init__(self, selectors, fuse_regex=False, max_scan_chars=MAX_SCAN_CHARS):
+        self.rules = {}
+        html_patterns = []
+        for selector_type, type_selectors in selectors.items():
+            self.rules[selector_type] = []
+            for selector in type_selectors or []:
+                try:
+                    rule = self.compile(selector)
+                    self.rules[selector_type].append(rule)
+                    if rule[0] == 'regex':
+                        html_patterns.append((selector_type, rule[1]))
+                except Exception as e:
+                    logging.warning(f"Selector error ({selector}): {str(e)}")
+                    
+        # One pass over the page text for contacts, one over the HTML for regex: selectors
+        self.text_scanner = RegexScanner(
+            [('email', EMAIL_PATTERN), ('phone', PHONE_PATTERN)],
+            fuse=fuse_regex, max_chars=max_scan_chars
+        )
+        self.html_scanner = RegexScanner(html_patterns, fuse=fuse_regex, max_chars=max_scan_chars)
+
+    def compile(self, selector):
+        if selector.startswith('//'):
+            return 'xpath', etree.XPath(selector), False
+        if selector.startswith('regex:'):
+            return 'regex', re.compile(selector.split('regex:', 1)[1].strip()), False
+        return 'css', etree.XPath(HTMLTranslator().css_to_xpath(selector)), 'meta' in selector
+
+    def select(self, doc, selector_type):
+        results = []
+        for kind, rule, is_meta in self.rules.get(selector_type, []):
+            try:
+                if kind == 'regex':
+                    continue
+                for match in rule(doc.root):
+                    if isinstance(match, str):
+                        results.append(match.strip())
+                    elif is_meta:
+                        results.append(match.get('content', '').strip())
+                    else:
+                        results.append(match.text_content().strip())
+            except Exception as e:
+                logging.warning(f"Selector error ({selector_type}): {str(e)}")
+                
+        if doc.regex_matches is None:
+            doc.regex_matches = self.html_scanner.scan(doc.html)
+        results.extend(doc.regex_matches.get(selector_type, []))
+        return ", ".join(filter(None, set(results)))
+
+    def ready_xpath(self, selector_type):
+        # Union of the structural selectors, evaluated in the browser to tell when content has rendered
+        paths = [rule.path for kind, rule, _ in self.rules.get(selector_type, []) if kind != 'regex']
+        return " | ".join(paths) or None
+
+    def has_hits(self, doc, selector_type):
+        structural = [rule for kind, rule, _ in self.rules.get(selector_type, []) if kind != 'regex']
+        if not structural:
+            return None
+        return any(rule(doc.root) for rule in structural)
+
+    def extract(self, doc, level='basic'):
+        contacts = self.text_scanner.scan(doc.text)
+        fields = {
+            'name': self.select(doc, 'company_name'),
+            'email': ", ".join(sorted(set(contacts.get('email', [])))),
+            'phone': ", ".join(set(phone.strip() for phone in contacts.get('phone', [])))
+        }
+        if level in ('medium', 'advanced'):
+            fields['description'] = self.select(doc, 'description')
+            fields['address'] = self.select(doc, 'address')
+            
+            social_links = self.select(doc, 'social').split(", ")
+            for link in social_links:
+                if 'linkedin.com' in link: fields['linkedin'] = link
+                if 'twitter.com' in link: fields['twitter'] = link
+                if 'facebook.com' in link: fields['facebook'] = link
+        return fields
+
+def page_needs_browser(doc, plan, min_text_length):
+    if len(" ".join(doc.text.split())) < min_text_length:
+        return True
+        
+    for noscript in doc.root.xpath('//noscript'):
+        text = noscript.text_content().lower()
+        if 'javascript' in text and ('enable' in text or 'require' in text):
+            return True
+    
+    if plan.has_hits(doc, 'company_name') is False:
+        return True
+    return False
+
+def same_domain_links(doc, url):
+    domain = registered_domain(url)
+    links = []
+    for href in doc.links():
+        link = urljoin(url, href.strip())
+        if link.startswith(('http://', 'https://')) and registered_domain(link) == domain:
+            links.append(link)
+    return links
+
+# Extraction stage state, built once per worker process since compiled XPaths do not pickle
+_extraction_plan = None
+
+def init_extraction_worker(selectors, fuse_regex, max_scan_chars):
+    global _extraction_plan
+    _extraction_plan = ExtractionPlan(selectors, fuse_regex=fuse_regex, max_scan_chars=max_scan_chars)
+
+def extract_page(html, url, level, min_text_length=None, follow_links=False):
+    started = time.perf_counter()
+    doc = PageDocument(html)
+    if min_text_length is not None and page_needs_browser(doc, _extraction_plan, min_text_length):
+        return {'needs_browser': True, 'timings': {'parse': time.perf_counter() - started}}
+    parsed = time.perf_counter()
+    fields = _extraction_plan.extract(doc, level)
+    extracted = time.perf_counter()
+    links = same_domain_links(doc, url) if follow_links else []
+    return {
+        'needs_browser': False,
+        'fields': fields,
+        'links': links,
+        'timings': {
+            'parse': parsed - started,
+            'extract': extracted - parsed,
+            'links': time.perf_counter() - extracted
+        }
+    }
+
+def normalize_url(url):
+    url = url.strip()
+    if '://' not in url:
+        url = "https://" + url
+    parsed = urlparse(url)
+    scheme = (parsed.scheme or 'https').lower()
+    netloc = parsed.netloc.lower()
+    if (scheme, netloc[-3:]) == ('http', ':80') or (scheme, netloc[-4:]) == ('https', ':443'):
+        netloc = netloc.rsplit(':', 1)[0]
+    path = parsed.path or '/'
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return f"{scheme}://{netloc}{path}" + (f"?{query}" if query else "")
+
+@lru_cache(maxsize=65536)
+def host_domain(host):
+    # tldextract 5.3 renamed registered_domain and deprecated the old name
+    extracted = domain_extractor()(host)
+    domain = getattr(extracted, 'top_domain_under_public_suffix', None)
+    if domain is None:
+        domain = extracted.registered_domain
+    return domain or host
+
+_domain_extractor = None
+
+def domain_extractor():
+    # The suffix list snapshot bundled with tldextract is used as is: no fetch of the live
+    # list on first use and no cache directory to write
+    global _domain_extractor
+    if _domain_extractor is None:
+        from tldextract import TLDExtract
+        _domain_extractor = TLDExtract(suffix_list_urls=(), cache_dir=None)
+    return _domain_extractor
+
+def registered_domain(url):
+    return host_domain(urlparse(url).hostname or '')
+
+class CrawlFrontier:
+    def __init__(self, max_pages_per_domain=0):
+        self.max_pages_per_domain = max_pages_per_domain
+        self.heap = []
+        self.seen = set()
+        self.per_domain = {}
+        self.counter = itertools.count()
+
+    def add(self, url, depth=0):
+        if not self.mark_seen(url, depth):
+            return False
+        # Shallower pages first, then discovery order
+        heapq.heappush(self.heap, (depth, next(self.counter), url))
+        return True
+
+    def mark_seen(self, url, depth=0):
+        key = normalize_url(url)
+        if key in self.seen:
+            return False
+        domain = registered_domain(url)
+        # The budget caps discovered links; URLs the user asked for are always scraped
+        if depth and self.max_pages_per_domain and self.per_domain.get(domain, 0) >= self.max_pages_per_domain:
+            return False
+        self.seen.add(key)
+        self.per_domain[domain] = self.per_domain.get(domain, 0) + 1
+        return True
+
+    def pop(self):
+        depth, _, url = heapq.heappop(self.heap)
+        return url, depth
+
+    @property
+    def accepted(self):
+        return len(self.seen)
+
+    def __len__(self):
+        return len(self.heap)
+
+RECORD_FIELDS = [
+    'url', 'name', 'website', 'email', 'phone', 'linkedin', 'twitter', 'facebook',
+    'description', 'address', 'tech_stack', 'scrape_time', 'status'
+]
+
+class RecordSink:
+    extension = ''
+
+    def __init__(self, filename, batch_size=50, compression='zstd'):
+        self.path = f"{filename}.{self.extension}"
+        self.batch_size = max(1, batch_size)
+        self.compression = compression
+        self.buffer = []
+        self.count = 0
+        self.lock = threading.Lock()
+        self.open()
+
+    def write(self, record):
+        with self.lock:
+            self.buffer.append(record)
+            self.count += 1
+            if len(self.buffer) >= self.batch_size:
+                self.flush_buffer()
+
+    def flush(self):
+        with self.lock:
+            self.flush_buffer()
+
+    def flush_buffer(self):
+        if self.buffer:
+            self.write_batch(self.buffer)
+            self.buffer = []
+
+    def close(self):
+        with self.lock:
+            self.flush_buffer()
+            self.close_output()
+
+class CsvSink(RecordSink):
+    extension = 'csv'
+
+    def open(self):
+        self.file = open(self.path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=RECORD_FIELDS, extrasaction='ignore')
+        self.writer.writeheader()
+        self.file.flush()
+
+    def write_batch(self, records):
+        # One physical line per record keeps the file tail-readable
+        self.writer.writerows(
+            {key: " ".join(value.splitlines()) if isinstance(value, str) else value
+             for key, value in record.items()}
+            for record in records
+        )
+        self.file.flush()
+
+    def close_output(self):
+        self.file.close()
+
+class JsonLinesSink(RecordSink):
+    extension = 'jsonl'
+
+    def open(self):
+        self.file = open(self.path, 'w', encoding='utf-8')
+
+    def write_batch(self, records):
+        self.file.write("".join(json.dumps(record) + "\n" for record in records))
+        self.file.flush()
+
+    def close_output(self):
+        self.file.close()
+
+class SqliteSink(RecordSink):
+    extension = 'db'
+    # Fields whose changes are kept in companies_history
+    TRACKED_FIELDS = [field for field in RECORD_FIELDS if field not in ('url', 'scrape_time', 'status')]
+
+    def open(self):
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(companies)")]
+        legacy = bool(columns) and 'canonical_url' not in columns
+        if legacy:
+            self.conn.execute("ALTER TABLE companies RENAME TO companies_legacy")
+            
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS companies (
+                canonical_url TEXT PRIMARY KEY,
+                {', '.join(f'{field} TEXT' for field in RECORD_FIELDS)},
+                first_seen TEXT
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS companies_history (
+                canonical_url TEXT,
+                field TEXT,
+                old_value TEXT,
+                new_value TEXT,
+                changed_at TEXT
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_companies_website ON companies (website)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_companies_scrape_time ON companies (scrape_time)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_history_url ON companies_history (canonical_url)")
+        self.conn.commit()
+        
+        if legacy:
+            # Fold tables written by the old replace-on-export mode into the upsert table
+            self.conn.row_factory = sqlite3.Row
+            rows = [dict(row) for row in self.conn.execute("SELECT * FROM companies_legacy")]
+            self.conn.row_factory = None
+            for i in range(0, len(rows), 1000):
+                self.write_batch(rows[i:i + 1000])
+            self.conn.execute("DROP TABLE companies_legacy")
+            self.conn.commit()
+
+    def write_batch(self, records):
+        latest = {}
+        for record in records:
+            if record.get('url'):
+                latest[normalize_url(record['url'])] = record
+        keys = list(latest)
+        
+        with self.conn:
+            existing = {}
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                cursor = self.conn.execute(
+                    f"SELECT canonical_url, {', '.join(RECORD_FIELDS)} FROM companies "
+                    f"WHERE canonical_url IN ({', '.join('?' for _ in chunk)})",
+                    chunk
+                )
+                for row in cursor:
+                    existing[row[0]] = dict(zip(RECORD_FIELDS, row[1:]))
+                    
+            upserts, status_updates, history = [], [], []
+            for key, record in latest.items():
+                values = {field: record.get(field) or '' for field in RECORD_FIELDS}
+                old = existing.get(key)
+                if old and values['status'] != 'success':
+                    # A failed re-scrape must not blank out previously extracted data
+                    status_updates.append((values['status'], values['scrape_time'], key))
+                    continue
+                if old:
+                    for field in self.TRACKED_FIELDS:
+                        if (old[field] or '') != values[field]:
+                            history.append((key, field, old[field], values[field], values['scrape_time']))
+                upserts.append((key, *(values[field] for field in RECORD_FIELDS), values['scrape_time']))
+                
+            self.conn.executemany(f"""
+                INSERT INTO companies (canonical_url, {', '.join(RECORD_FIELDS)}, first_seen)
+                VALUES ({', '.join('?' for _ in range(len(RECORD_FIELDS) + 2))})
+                ON CONFLICT (canonical_url) DO UPDATE SET
+                    {', '.join(f'{field} = excluded.{field}' for field in RECORD_FIELDS)}
+            """, upserts)
+            self.conn.executemany(
+                "UPDATE companies SET status = ?, scrape_time = ? WHERE canonical_url = ?",
+                status_updates
+            )
+            self.conn.executemany("INSERT INTO companies_history VALUES (?, ?, ?, ?, ?)", history)
+
+    def close_output(self):
+        self.conn.close()
+
+LIST_FIELDS = ('email', 'phone', 'tech_stack')
+
+def arrow_schema():
+    import pyarrow as pa
+    return pa.schema([
+        pa.field(field, pa.list_(pa.string()) if field in LIST_FIELDS
+                 else pa.timestamp('us') if field == 'scrape_time'
+                 else pa.string())
+        for field in RECORD_FIELDS
+    ])
+
+def arrow_table(records, schema):
+    import pyarrow as pa
+    columns = {field: [] for field in RECORD_FIELDS}
+    for record in records:
+        for field in RECORD_FIELDS:
+            value = record.get(field)
+            if field in LIST_FIELDS:
+                value = [item for item in (value or '').split(', ') if item] if isinstance(value, str) else value
+            elif field == 'scrape_time':
+                value = datetime.fromisoformat(value) if value else None
+            columns[field].append(value)
+    return pa.table(columns, schema=schema)
+
+class ParquetSink(RecordSink):
+    extension = 'parquet'
+
+    def open(self):
+        # pyarrow is only needed when a columnar format is requested
+        import pyarrow.parquet as pq
+        self.schema = arrow_schema()
+        # Each flushed batch becomes one row group
+        self.writer = pq.ParquetWriter(self.path, self.schema, compression=self.compression)
+
+    def write_batch(self, records):
+        self.writer.write_table(arrow_table(records, self.schema))
+
+    def close_output(self):
+        self.writer.close()
+
+class ArrowSink(RecordSink):
+    extension = 'arrow'
+
+    def open(self):
+        import pyarrow as pa
+        self.schema = arrow_schema()
+        self.file = pa.OSFile(self.path, 'wb')
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        self.writer = pa.ipc.new_file(self.file, self.schema, options=options)
+
+    def write_batch(self, records):
+        self.writer.write_table(arrow_table(records, self.schema))
+
+    def close_output(self):
+        self.writer.close()
+        self.file.close()
+
+SINKS = {'csv': CsvSink, 'json': JsonLinesSink, 'sqlite': SqliteSink, 'parquet': ParquetSink, 'arrow': ArrowSink}
+
+class JobJournal:
+    JOB_FIELDS = ('query', 'urls', 'level', 'depth', 'pages', 'max_results', 'format', 'output', 'selectors',
+                  'distributed')
+
+    def __init__(self, path='jobs.db'):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                args TEXT,
+                status TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                searched INTEGER DEFAULT 0
+            )
+        """)
+        if 'searched' not in [row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")]:
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN searched INTEGER DEFAULT 0")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                job_id TEXT,
+                url TEXT,
+                depth INTEGER DEFAULT 0,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                record TEXT,
+                updated_at TEXT,
+                PRIMARY KEY (job_id, url)
+            )
+        """)
+        self.conn.commit()
+
+    def create_job(self, args, job_id=None):
+        job_id = job_id or uuid.uuid4().hex[:12]
+        saved = {field: getattr(args, field, None) for field in self.JOB_FIELDS}
+        now = datetime.now().isoformat()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO jobs (job_id, args, status, created_at, updated_at) VALUES (?, ?, 'running', ?, ?)",
+                (job_id, json.dumps(saved), now, now)
+            )
+        return job_id
+
+    def load_job(self, job_id):
+        with self.lock:
+            row = self.conn.execute("SELECT args FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_status(self, job_id, status):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                (status, datetime.now().isoformat(), job_id)
+            )
+
+    def mark_searched(self, job_id):
+        # A query job's results pages have all been read; until then a resume searches again
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET searched = 1 WHERE job_id = ?", (job_id,))
+
+    def searched(self, job_id):
+        with self.lock:
+            row = self.conn.execute("SELECT searched FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def plan(self, job_id, urls, depth=0):
+        now = datetime.now().isoformat()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO urls (job_id, url, depth, updated_at) VALUES (?, ?, ?, ?)",
+                [(job_id, url, depth, now) for url in urls]
+            )
+
+    def complete(self, job_id, record):
+        status = 'done' if record.get('status') == 'success' else 'failed'
+        with self.lock, self.conn:
+            self.conn.execute("""
+                INSERT INTO urls (job_id, url, status, attempts, record, updated_at)
+                VALUES (?, ?, ?, 1, ?, ?)
+                ON CONFLICT (job_id, url) DO UPDATE SET
+                    status = excluded.status,
+                    attempts = urls.attempts + 1,
+                    record = excluded.record,
+                    updated_at = excluded.updated_at
+            """, (job_id, record['url'], status, json.dumps(record), datetime.now().isoformat()))
+
+    def has_plan(self, job_id):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM urls WHERE job_id = ? LIMIT 1", (job_id,)).fetchone() is not None
+
+    def records(self, job_id):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT record FROM urls WHERE job_id = ? AND status = 'done' ORDER BY updated_at",
+                (job_id,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def remaining(self, job_id):
+        # Pending URLs and failed ones, which are retried on resume
+        with self.lock:
+            return self.conn.execute(
+                "SELECT url, depth FROM urls WHERE job_id = ? AND status != 'done' ORDER BY depth",
+                (job_id,)
+            ).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class UrlQueue:
+    # The frontier and results of distributed jobs, shared through one SQLite file by the
+    # coordinator and every worker process. A lease that is not completed within
+    # lease_seconds (the worker died or hung) returns the URL to the queue, at most
+    # max_attempts times.
+    def __init__(self, path='queue.db', lease_seconds=300, max_attempts=3):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        # Transactions are opened explicitly so leases are taken under a write lock across processes
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS queue_jobs (
+                job_id TEXT PRIMARY KEY,
+                level TEXT,
+                depth INTEGER,
+                max_pages_per_domain INTEGER,
+                status TEXT,
+                created_at TEXT
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS queue_urls (
+                job_id TEXT,
+                key TEXT,
+                url TEXT,
+                domain TEXT,
+                depth INTEGER,
+                status TEXT DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER DEFAULT 0,
+                PRIMARY KEY (job_id, key)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_queue_urls_status ON queue_urls (status, lease_expires)")
+        # Pages queued per domain, kept alongside queue_urls so the budget check is one lookup
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS queue_domains (
+                job_id TEXT,
+                domain TEXT,
+                pages INTEGER,
+                PRIMARY KEY (job_id, domain)
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS queue_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT,
+                url TEXT,
+                record TEXT
+            )
+        """)
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def create_job(self, job_id, level='basic', depth=0, max_pages_per_domain=0):
+        # Returns whether the job was already queued, i.e. it is being resumed
+        with self.transaction() as conn:
+            existing = conn.execute("SELECT 1 FROM queue_jobs WHERE job_id = ?", (job_id,)).fetchone() is not None
+            conn.execute(
+                "INSERT OR REPLACE INTO queue_jobs VALUES (?, ?, ?, ?, 'running', ?)",
+                (job_id, level, depth, max_pages_per_domain, datetime.now().isoformat())
+            )
+        return existing
+
+    def set_status(self, job_id, status):
+        with self.transaction() as conn:
+            conn.execute("UPDATE queue_jobs SET status = ? WHERE job_id = ?", (status, job_id))
+
+    def add(self, job_id, urls, depth=0):
+        with self.transaction() as conn:
+            return self.insert(conn, job_id, urls, depth)
+
+    def insert(self, conn, job_id, urls, depth):
+        # Seen URLs are skipped and links stop at each domain's page budget, as in CrawlFrontier
+        job = conn.execute("SELECT max_pages_per_domain FROM queue_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        budget = job[0] if job else 0
+        pages = {}
+        added = 0
+        for url in urls:
+            domain = registered_domain(url)
+            if domain not in pages:
+                row = conn.execute(
+                    "SELECT pages FROM queue_domains WHERE job_id = ? AND domain = ?", (job_id, domain)
+                ).fetchone()
+                pages[domain] = row[0] if row else 0
+            if depth and budget and pages[domain] >= budget:
+                continue
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO queue_urls (job_id, key, url, domain, depth) VALUES (?, ?, ?, ?, ?)",
+                (job_id, normalize_url(url), url, domain, depth)
+            ).rowcount
+            pages[domain] += inserted
+            added += inserted
+        conn.executemany(
+            "INSERT OR REPLACE INTO queue_domains (job_id, domain, pages) VALUES (?, ?, ?)",
+            [(job_id, domain, count) for domain, count in pages.items()]
+        )
+        return added
+
+    def retry(self, job_id, urls):
+        # A resumed job's unfinished URLs go back to the queue, including ones reported as errors
+        with self.transaction() as conn:
+            conn.executemany(
+                "UPDATE queue_urls SET status = 'pending', worker = NULL, lease_expires = NULL, attempts = 0 "
+                "WHERE job_id = ? AND key = ? AND status != 'pending'",
+                [(job_id, normalize_url(url)) for url in urls]
+            )
+            return self.insert(conn, job_id, urls, 0)
+
+    def lease(self, worker, count=1):
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE queue_urls SET status = 'failed' WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            )
+            rows = conn.execute("""
+                SELECT u.job_id, u.key, u.url, u.depth, j.level, j.depth
+                FROM queue_urls u JOIN queue_jobs j ON j.job_id = u.job_id
+                WHERE j.status = 'running' AND (u.status = 'pending' OR (u.status = 'leased' AND u.lease_expires < ?))
+                ORDER BY u.depth, u.rowid
+                LIMIT ?
+            """, (now, count)).fetchall()
+            conn.executemany(
+                "UPDATE queue_urls SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE job_id = ? AND key = ?",
+                [(worker, now + self.lease_seconds, job_id, key) for job_id, key, *_ in rows]
+            )
+        return [
+            {'job_id': job_id, 'url': url, 'depth': depth, 'level': level, 'max_depth': max_depth}
+            for job_id, _, url, depth, level, max_depth in rows
+        ]
+
+    def complete(self, job_id, url, record=None, links=None, worker=None):
+        # The first report for a URL wins; a late one from a worker whose lease expired is dropped
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT q.depth, q.status, j.depth FROM queue_urls q JOIN queue_jobs j ON j.job_id = q.job_id "
+                "WHERE q.job_id = ? AND q.key = ?",
+                (job_id, normalize_url(url))
+            ).fetchone()
+            if row is None or row[1] == 'done':
+                return False
+            depth, _, max_depth = row
+            conn.execute(
+                "UPDATE queue_urls SET status = 'done', worker = ?, lease_expires = NULL WHERE job_id = ? AND key = ?",
+                (worker, job_id, normalize_url(url))
+            )
+            if record is not None:
+                conn.execute(
+                    "INSERT INTO queue_records (job_id, url, record) VALUES (?, ?, ?)",
+                    (job_id, url, json.dumps(record, default=str))
+                )
+            if links and depth < max_depth:
+                self.insert(conn, job_id, links, depth + 1)
+        return True
+
+    def urls(self, job_id, after=0, limit=5000):
+        # Every URL the job has queued, seeds and discovered links alike, in the order they were added
+        with self.lock:
+            return self.conn.execute(
+                "SELECT rowid, url, depth FROM queue_urls WHERE job_id = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                (job_id, after, limit)
+            ).fetchall()
+
+    def last_record(self, job_id):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM queue_records WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+
+    def records(self, job_id, after=0, limit=500):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, record FROM queue_records WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (job_id, after, limit)
+            ).fetchall()
+        return [(row_id, json.loads(record)) for row_id, record in rows]
+
+    def counts(self, job_id):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) FROM queue_urls WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall()
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def idle(self):
+        # Nothing left for any worker in any running job
+        with self.lock:
+            return self.conn.execute("""
+                SELECT 1 FROM queue_urls u JOIN queue_jobs j ON j.job_id = u.job_id
+                WHERE j.status = 'running' AND u.status IN ('pending', 'leased') LIMIT 1
+            """).fetchone() is None
+
+    def close(self):
+        self.conn.close()
+
+class RemoteQueue:
+    # A worker's view of a coordinator's UrlQueue, through the web service's /queue routes
+    def __init__(self, base_url, session=None):
+        self.base_url = base_url.rstrip('/')
+        self.session = session or requests.Session()
+
+    def call(self, path, payload):
+        response = self.session.post(f"{self.base_url}/queue/{path}", json=payload, timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+    def lease(self, worker, count=1):
+        return self.call('lease', {'worker': worker, 'count': count})
+
+    def complete(self, job_id, url, record=None, links=None, worker=None):
+        return self.call('complete', {'job_id': job_id, 'url': url, 'record': record, 'links': links,
+                                      'worker': worker})
+
+    def idle(self):
+        return self.call('idle', {})
+
+    def close(self):
+        self.session.close()
+
+def tail_lines(path, limit, block_size=65536):
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        data = b''
+        while end > 0 and data.count(b'\n') <= limit:
+            start = max(0, end - block_size)
+            f.seek(start)
+            data = f.read(end - start) + data
+            end = start
+    lines = [line.decode('utf-8') for line in data.splitlines() if line.strip()]
+    # Also report whether the first returned line is the first line of the file
+    return lines[-limit:], end == 0 and len(lines) <= limit
+
+def tail_records(path, limit=10):
+    if not path or not os.path.exists(path):
+        return []
+    if path.endswith('.db'):
+        conn = sqlite3.connect(path)
+        try:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT * FROM companies ORDER BY scrape_time DESC, rowid DESC LIMIT ?", (limit,)).fetchall()
+            return [dict(row) for row in reversed(rows)]
+        finally:
+            conn.close()
+    if path.endswith('.jsonl'):
+        return [json.loads(line) for line in tail_lines(path, limit)[0]]
+    if path.endswith('.csv'):
+        with open(path, encoding='utf-8') as f:
+            header = f.readline()
+        lines, from_start = tail_lines(path, limit + 1)
+        if from_start:
+            lines = lines[1:]
+        return list(csv.DictReader([header] + lines[-limit:]))
+    if path.endswith('.json'):
+        with open(path) as f:
+            return json.load(f)[-limit:]
+    if path.endswith(('.parquet', '.arrow')):
+        return tail_columnar(path, limit)
+    return []
+
+def tail_columnar(path, limit):
+    # Only the trailing row groups / record batches are read
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    if path.endswith('.parquet'):
+        reader = pq.ParquetFile(path)
+        count, read = reader.num_row_groups, reader.read_row_group
+    else:
+        reader = pa.ipc.open_file(path)
+        count, read = reader.num_record_batches, reader.get_batch
+    batches = []
+    rows = 0
+    for index in range(count - 1, -1, -1):
+        batch = read(index)
+        batches.insert(0, batch)
+        rows += batch.num_rows
+        if rows >= limit:
+            break
+    records = []
+    for batch in batches:
+        records.extend(batch.to_pylist())
+    for record in records:
+        if record.get('scrape_time'):
+            record['scrape_time'] = record['scrape_time'].isoformat()
+    return records[-limit:]
+
+def record_matches(record, filters=None, text=None):
+    # Case-insensitive substring match on the given fields, and on any field for `text`
+    for field, value in (filters or {}).items():
+        if str(value).lower() not in str(record.get(field) or '').lower():
+            return False
+    if text:
+        text = text.lower()
+        return any(text in str(value).lower() for value in record.values() if value)
+    return True
+
+class RecordBuffer:
+    # The most recent records of every job, kept in memory so the dashboard can page, filter
+    # and stream results without re-reading the output files
+    def __init__(self, capacity=1000):
+        self.records = deque(maxlen=capacity)
+        self.cursor = 0
+        self.version = 0
+        self.changed = threading.Condition()
+
+    def resize(self, capacity):
+        with self.changed:
+            self.records = deque(self.records, maxlen=capacity)
+
+    def append(self, record, job_id=None):
+        with self.changed:
+            self.cursor += 1
+            self.records.append((self.cursor, job_id, record))
+            self.version += 1
+            self.changed.notify_all()
+            return self.cursor
+
+    def notify(self):
+        # Wakes streams for a status change that came without a new record
+        with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+
+    def wait(self, version, timeout=None):
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def since(self, cursor, job_id=None):
+        with self.changed:
+            # Sequence numbers are contiguous, so the first newer record is found by position
+            first = self.records[0][0] if self.records else cursor + 1
+            start = max(0, cursor + 1 - first)
+            entries = list(itertools.islice(self.records, start, None))
+        return [(seq, record) for seq, job, record in entries if job_id is None or job == job_id]
+
+    def query(self, job_id=None, filters=None, text=None, offset=0, limit=10):
+        # Newest first; returns one page of (sequence, record) pairs and the number of matches
+        with self.changed:
+            entries = list(self.records)
+        matches = [(seq, record) for seq, job, record in reversed(entries)
+                   if (job_id is None or job == job_id) and record_matches(record, filters, text)]
+        return matches[offset:offset + limit], len(matches)
+
+RESULTS = RecordBuffer()
+
+def interleave_by_domain(urls):
+    by_domain = {}
+    for url in urls:
+        by_domain.setdefault(urlparse(url).netloc, []).append(url)
+    ordered = []
+    while by_domain:
+        for domain in list(by_domain):
+            ordered.append(by_domain[domain].pop(0))
+            if not by_domain[domain]:
+                del by_domain[domain]
+    return ordered
+
+READY_SCRIPT = (
+    "return document.evaluate(arguments[0], document, null,"
+    " XPathResult.ANY_UNORDERED_NODE_TYPE, null).singleNodeValue !== null;"
+)
+
+TRANSFER_SIZE_SCRIPT = (
+    "return performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'))"
+    ".reduce((total, entry) => total + (entry.transferSize || 0), 0);"
+)
+
+# Blocked by URL since CDP's Network domain has no per-resource-type filter
+RESOURCE_URL_PATTERNS = {
+    'image': ['png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp'],
+    'font': ['woff', 'woff2', 'ttf', 'otf', 'eot'],
+    'media': ['mp4', 'webm', 'ogg', 'mp3', 'wav', 'm3u8', 'mov'],
+    'stylesheet': ['css']
+}
+
+def blocked_url_patterns(resource_types, url_patterns):
+    patterns = list(url_patterns or [])
+    for resource_type in resource_types or []:
+        for extension in RESOURCE_URL_PATTERNS.get(resource_type, []):
+            patterns.extend([f"*.{extension}", f"*.{extension}?*"])
+    return patterns
+
+STEALTH_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+_chromedriver_lock = threading.Lock()
+_chromedriver_path = None
+
+def chromedriver_path():
+    # ChromeDriverManager().install() hits the network and disk on every call, so resolve it once per process
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            from webdriver_manager.chrome import ChromeDriverManager
+            _chromedriver_path = ChromeDriverManager().install()
+        return _chromedriver_path
+
+class BrowserPool:
+    def __init__(self, launch, quit, max_pages=200, max_memory_mb=1024, warm_per_proxy=1):
+        self.launch = launch
+        self.quit = quit
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.warm_per_proxy = warm_per_proxy
+        self.lock = threading.Lock()
+        self.browsers = {}
+        self.idle = {}
+        self.stats = {'launched': 0, 'reused': 0, 'recycled': 0}
+
+    def track(self, driver, proxy):
+        with self.lock:
+            self.browsers[driver] = {'proxy': proxy, 'pages': 0}
+            self.stats['launched'] += 1
+
+    def forget(self, driver):
+        with self.lock:
+            self.browsers.pop(driver, None)
+            for drivers in self.idle.values():
+                if driver in drivers:
+                    drivers.remove(driver)
+
+    def proxy_of(self, driver):
+        with self.lock:
+            return self.browsers.get(driver, {}).get('proxy')
+
+    def alive(self, driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, proxy, user_agent=None):
+        # A warm browser already routed through this proxy only needs a fresh identity
+        while True:
+            with self.lock:
+                idle = self.idle.get(proxy)
+                driver = idle.pop() if idle else None
+            if driver is None:
+                return self.launch(proxy, user_agent)
+            if self.alive(driver):
+                with self.lock:
+                    self.stats['reused'] += 1
+                self.reset_identity(driver, user_agent)
+                return driver
+            self.quit(driver)
+
+    def release(self, driver):
+        if driver is None:
+            return
+        if not self.alive(driver) or self.due(driver):
+            self.quit(driver)
+            return
+        with self.lock:
+            proxy = self.browsers.get(driver, {}).get('proxy')
+            idle = self.idle.setdefault(proxy, [])
+            keep = len(idle) < self.warm_per_proxy
+            if keep:
+                idle.append(driver)
+        if not keep:
+            self.quit(driver)
+
+    def switch(self, driver, proxy, user_agent=None):
+        replacement = self.acquire(proxy, user_agent)
+        self.release(driver)
+        return replacement
+
+    def page_done(self, driver):
+        with self.lock:
+            info = self.browsers.get(driver)
+            if info is None:
+                return driver
+            info['pages'] += 1
+        if not self.due(driver):
+            return driver
+        logging.info(f"Recycling browser after {info['pages']} pages")
+        try:
+            replacement = self.launch(info['proxy'], None)
+        except Exception as e:
+            logging.error(f"Replacement browser could not start: {str(e)}")
+            return driver
+        self.quit(driver)
+        with self.lock:
+            self.stats['recycled'] += 1
+        return replacement
+
+    def due(self, driver):
+        with self.lock:
+            pages = self.browsers.get(driver, {}).get('pages', 0)
+        if self.max_pages and pages >= self.max_pages:
+            return True
+        return bool(self.max_memory_mb) and self.memory_mb(driver) >= self.max_memory_mb
+
+    def memory_mb(self, driver):
+        try:
+            driver.execute_cdp_cmd('Performance.enable', {})
+            metrics = driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']
+            heap = next(m['value'] for m in metrics if m['name'] == 'JSHeapTotalSize')
+            return heap / (1024 * 1024)
+        except Exception:
+            return 0
+
+    def reset_identity(self, driver, user_agent=None):
+        # Cookies, cache and storage from the previous identity must not follow the browser
+        try:
+            driver.get('about:blank')
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+            if user_agent:
+                driver.execute_cdp_cmd('Network.setUserAgentOverride', {'userAgent': user_agent})
+        except Exception as e:
+            logging.warning(f"Browser identity reset failed: {str(e)}")
+
+    def close(self):
+        with self.lock:
+            drivers = [driver for idle in self.idle.values() for driver in idle]
+            self.idle = {}
+        for driver in drivers:
+            self.quit(driver)
+
+def result_links(html, selector):
+    links = []
+    for element in PageDocument(html).root.cssselect(selector):
+        href = element.get('href')
+        if href and urlparse(href).netloc:
+            links.append(href)
+    return links
+
+class SearchBackend:
+    # results_page() returns the result URLs a search engine lists for one page of a query,
+    # raising when the engine fails or blocks so the caller can retry
+    def __init__(self, scraper):
+        self.scraper = scraper
+
+    def results_page(self, query, start):
+        raise NotImplementedError
+
+    def pause(self):
+        pass
+
+    def get(self, url, headers=None):
+        scraper = self.scraper
+        headers = dict(headers or {})
+        if scraper.user_agents:
+            headers.setdefault('User-Agent', random.choice(scraper.user_agents))
+        proxy = scraper.proxy_manager.choose()
+        started = time.time()
+        try:
+            with scraper.rate_limiter.throttle(registered_domain(url)):
+                with scraper.metrics.timer('search_load'):
+                    response = scraper.session.get(url, headers=headers, timeout=15,
+                                                   proxies=scraper.proxy_manager.requests_proxies(proxy))
+        except requests.RequestException:
+            scraper.proxy_manager.record(proxy, False, time.time() - started)
+            raise
+        decode_html(response)
+        blocked = looks_blocked(response.status_code, response.text)
+        scraper.proxy_manager.record(proxy, True, time.time() - started, blocked)
+        if blocked:
+            scraper.metrics.inc('scraper_errors_total', stage='search', category='blocked')
+            raise Exception("Search engine anti-bot detection triggered")
+        if response.status_code != 200:
+            raise Exception(f"Search returned status {response.status_code}")
+        return response
+
+class BrowserSearch(SearchBackend):
+    # Renders the results page in Chrome with human-like pacing; slowest, but works where
+    # the engine serves nothing useful to plain HTTP clients
+    def results_page(self, query, start):
+        from selenium.webdriver.common.action_chains import ActionChains
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        scraper = self.scraper
+        search_url = scraper.search_url.format(query=quote_plus(query), start=start)
+        
+        # Add human-like delay
+        with scraper.metrics.timer('search_sleep'):
+            time.sleep(random.uniform(1.5, 3.5))
+        
+        with scraper.metrics.timer('search_load'):
+            scraper.driver.get(search_url)
+            
+            # Human-like interactions
+            actions = ActionChains(scraper.driver)
+            actions.move_by_offset(random.randint(10, 100), random.randint(10, 100)).perform()
+            
+            # Wait for results to load
+            try:
+                WebDriverWait(scraper.driver, 15).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, scraper.search_results_container))
+                )
+            except TimeoutException:
+                logging.warning("Timed out waiting for search results")
+                raise
+        
+        # Check for CAPTCHA
+        html = scraper.driver.page_source
+        page_text = html.lower()
+        if "captcha" in page_text or "sorry" in page_text or "security check" in page_text:
+            scraper.proxy_manager.record(scraper.browsers.proxy_of(scraper.driver), True, blocked=True)
+            scraper.metrics.inc('scraper_errors_total', stage='search', category='blocked')
+            logging.warning("Search engine detection triggered")
+            raise Exception("Search engine anti-bot detection triggered")
+        
+        with scraper.metrics.timer('search_parse'):
+            return result_links(html, scraper.search_result_selector)
+
+    def pause(self):
+        from selenium.webdriver.common.action_chains import ActionChains
+        # Scroll and random mouse movement
+        driver = self.scraper.driver
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight)")
+        ActionChains(driver).move_by_offset(random.randint(-50, 50), random.randint(-50, 50)).perform()
+        with self.scraper.metrics.timer('search_sleep'):
+            time.sleep(random.uniform(0.8, 2.0))
+
+class HttpSearch(SearchBackend):
+    # The same results page fetched over plain HTTP, paced by the per-domain rate limiter
+    def results_page(self, query, start):
+        scraper = self.scraper
+        response = self.get(scraper.search_url.format(query=quote_plus(query), start=start))
+        with scraper.metrics.timer('search_parse'):
+            return result_links(response.text, scraper.search_result_selector)
+
+class ApiSearch(SearchBackend):
+    # A JSON search API; search_api_results is the dotted path to the result list and
+    # search_api_url_field the key holding each result's URL (Bing Web Search by default)
+    def results_page(self, query, start):
+        scraper = self.scraper
+        headers = {scraper.search_api_key_header: scraper.search_api_key} if scraper.search_api_key else {}
+        response = self.get(scraper.search_api_url.format(query=quote_plus(query), start=start, count=10), headers)
+        with scraper.metrics.timer('search_parse'):
+            items = response.json()
+            for part in scraper.search_api_results.split('.'):
+                items = items.get(part, []) if isinstance(items, dict) else []
+            urls = [item.get(scraper.search_api_url_field) for item in items if isinstance(item, dict)]
+            return [url for url in urls if url and urlparse(url).netloc]
+
+SEARCH_BACKENDS = {'browser': BrowserSearch, 'http': HttpSearch, 'api': ApiSearch}
+
 class CompanyScraper:
-    def __init__(self, config_path='config.yaml'):
+    def __init__(self, config_path='config.yaml', workers=None, cache_ttl=None, use_cache=True,
+                 proxy_manager=None):
+        self._local = threading.local()
+        self._drivers = []
+        self.lock = threading.Lock()
         self.load_config(config_path)
-        self.driver = self.init_webdriver()
+        if workers:
+            self.workers = max(1, int(workers))
+            self.max_concurrency = max(self.max_concurrency, self.workers)
+        self.rate_limiter = DomainRateLimiter(self.rate_limit, self.min_delay, self.max_delay)
+        self.metrics = Metrics(parent=METRICS)
+        # Proxy health carries over between jobs when the caller passes its manager back in
+        self.proxy_manager = proxy_manager or ProxyManager(
+            self.proxies,
+            failure_threshold=self.proxy_failure_threshold,
+            backoff=self.proxy_backoff,
+            max_backoff=self.proxy_max_backoff
+        )
+        self.proxy_manager.update(self.proxies)
+        self.browsers = BrowserPool(
+            self.init_webdriver, self.close_driver,
+            max_pages=self.browser_max_pages,
+            max_memory_mb=self.browser_max_memory_mb,
+            warm_per_proxy=self.warm_browsers_per_proxy
+        )
+        self.session = self.init_session()
+        self.searcher = SEARCH_BACKENDS[self.search_backend](self)
+        self.validation_cache = {}
+        self.cache = None
+        if use_cache and self.cache_path:
+            self.cache = ResponseCache(
+                self.cache_path,
+                ttl=self.cache_ttl if cache_ttl is None else cache_ttl,
+                max_bytes=self.cache_max_mb * 1024 * 1024
+            )
+        self.builtwith = BuiltWithClient(
+            self.builtwith_api,
+            base_url=self.builtwith_url,
+            session=self.session,
+            cache=self.cache,
+            ttl=self.builtwith_ttl,
+            workers=self.builtwith_workers,
+            user_agents=self.user_agents,
+            proxies=self.proxy_manager,
+            metrics=self.metrics
+        )
+        self.fetch_stats = {
+            'http': {'count': 0, 'seconds': 0.0},
+            'browser': {'count': 0, 'seconds': 0.0, 'bytes': 0, 'blocked': 0},
+            'cache': {'hits': 0, 'revalidated': 0},
+            'escalated': 0
+        }
         self.data = []
+        self.sink = None
+        self.journal = None
+        self.job_id = None
+        self.on_record = None
+        self.record_count = 0
         self.visited_urls = set()
         self.errors = 0
         self.start_time = datetime.now()
         self.cli_selectors = {}
+        self.cancel_event = threading.Event()
+        self.extractor = None
         
     def load_config(self, path):
         try:
             with open(path, 'r') as f:
                 self.config = yaml.safe_load(f)
             self.builtwith_api = self.config.get('builtwith_api', '')
+            self.builtwith_url = self.config.get('builtwith_url', 'https://api.builtwith.com/v19/api.json')
+            self.builtwith_ttl = self.config.get('builtwith_ttl', 7 * 86400)
+            self.builtwith_workers = self.config.get('builtwith_workers', 4)
             self.user_agents = self.config.get('user_agents', [])
             self.selectors = self.config.get('selectors', {})
             self.proxies = self.config.get('proxies', [])
+            self.proxy_failure_threshold = self.config.get('proxy_failure_threshold', 3)
+            self.proxy_backoff = self.config.get('proxy_backoff', 30)
+            self.proxy_max_backoff = self.config.get('proxy_max_backoff', 1800)
             self.rate_limit = self.config.get('rate_limit', 3)
             self.min_delay = self.config.get('min_delay', 2)
             self.max_delay = self.config.get('max_delay', 5)
             self.test_config = self.config.get('tests', {})
+            self.search_url = self.config.get('search_url', 'https://www.bing.com/search?q={query}&first={start}')
+            self.search_backend = self.config.get('search_backend', 'browser')
+            self.search_results_container = self.config.get('search_results_container', 'ol#b_results')
+            self.search_result_selector = self.config.get('search_result_selector', 'ol#b_results li.b_algo h2 a')
+            self.search_api_url = self.config.get(
+                'search_api_url', 'https://api.bing.microsoft.com/v7.0/search?q={query}&offset={start}&count={count}'
+            )
+            self.search_api_key = self.config.get('search_api_key', '')
+            self.search_api_key_header = self.config.get('search_api_key_header', 'Ocp-Apim-Subscription-Key')
+            self.search_api_results = self.config.get('search_api_results', 'webPages.value')
+            self.search_api_url_field = self.config.get('search_api_url_field', 'url')
+            self.search_cache_ttl = self.config.get('search_cache_ttl', 86400)
+            if self.search_backend not in SEARCH_BACKENDS:
+                raise ValueError(f"Unknown search_backend: {self.search_backend}")
+            self.fuse_regex = self.config.get('fuse_regex', False)
+            self.max_scan_chars = self.config.get('max_scan_chars', MAX_SCAN_CHARS)
+            self.plan = self.compile_plan()
+            self.workers = max(1, int(self.config.get('workers', 1)))
+            self.max_concurrency = self.config.get('max_concurrency', self.workers * 2)
+            self.max_pages_per_domain = self.config.get('max_pages_per_domain', 50)
+            self.extraction_processes = self.config.get('extraction_processes', os.cpu_count() or 1)
+            self.extraction_queue_size = max(1, self.config.get('extraction_queue_size', 32))
+            self.sink_batch_size = self.config.get('sink_batch_size', 50)
+            self.journal_path = self.config.get('journal_path', 'jobs.db')
+            self.queue_path = self.config.get('queue_path', 'queue.db')
+            self.queue_lease_seconds = self.config.get('queue_lease_seconds', 300)
+            self.queue_max_attempts = self.config.get('queue_max_attempts', 3)
+            self.queue_poll_interval = self.config.get('queue_poll_interval', 1.0)
+            self.row_group_size = self.config.get('row_group_size', 1000)
+            self.columnar_compression = self.config.get('columnar_compression', 'zstd')
+            self.validation_ttl = self.config.get('validation_ttl', 3600)
+            self.validation_workers = self.config.get('validation_workers', 10)
+            self.fetch_mode = self.config.get('fetch_mode', 'auto')
+            self.cache_path = self.config.get('cache_path', 'cache.db')
+            self.cache_ttl = self.config.get('cache_ttl', 3600)
+            self.cache_max_mb = self.config.get('cache_max_mb', 500)
+            self.min_text_length = self.config.get('min_text_length', 200)
+            self.lean_load = self.config.get('lean_load', True)
+            self.page_load_strategy = self.config.get('page_load_strategy', 'eager' if self.lean_load else 'normal')
+            self.page_load_timeout = self.config.get('page_load_timeout', 20)
+            self.browser_max_pages = self.config.get('browser_max_pages', 200)
+            self.browser_max_memory_mb = self.config.get('browser_max_memory_mb', 1024)
+            self.warm_browsers_per_proxy = self.config.get('warm_browsers_per_proxy', 1)
+            self.blocked_patterns = blocked_url_patterns(
+                self.config.get('blocked_resource_types', ['image', 'font', 'media']),
+                self.config.get('blocked_url_patterns', [])
+            ) if self.lean_load else []
             logging.info("Configuration loaded successfully")
         except Exception as e:
             logging.error(f"Error loading config: {str(e)}")
             raise
+
+    @property
+    def driver(self):
+        # Each worker thread drives its own browser, launched the first time a page needs one
+        driver = self.active_driver
+        if driver is None:
+            driver = self._local.driver = self.launch_driver()
+        return driver
+
+    @property
+    def active_driver(self):
+        # This thread's browser if it has one; never launches
+        return getattr(self._local, 'driver', None)
+
+    @driver.setter
+    def driver(self, value):
+        self._local.driver = value
         
-    def init_webdriver(self):
+    def chrome_options(self, proxy=None, user_agent=None):
+        from selenium.webdriver.chrome.options import Options
         options = Options()
         options.add_argument("--headless=new")
         options.add_argument("--disable-blink-features=AutomationControlled")
@@ -91,55 +2030,84 @@ class CompanyScraper:
         options.add_argument("--window-size=1920,1080")
         options.add_argument("--disable-dev-shm-usage")
         options.add_argument("--no-sandbox")
+        options.page_load_strategy = self.page_load_strategy
         
-        if self.user_agents:
-            ua = random.choice(self.user_agents)
+        if self.lean_load:
+            # Only the DOM is read, so skip image decoding and count what the blocklist stops
+            options.add_argument("--blink-settings=imagesEnabled=false")
+            options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        if self.blocked_patterns:
+            # Chrome buffers every network event for this log, so keep it only when blocked requests are counted
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        
+        if user_agent or self.user_agents:
+            ua = user_agent or random.choice(self.user_agents)
             options.add_argument(f"user-agent={ua}")
             logging.info(f"Using user agent: {ua[:50]}...")
             
-        if self.proxies:
-            proxy = random.choice(self.proxies)
+        if proxy or self.proxies:
+            proxy = proxy or self.proxy_manager.choose()
             options.add_argument(f'--proxy-server={proxy}')
             logging.info(f"Using proxy: {proxy}")
+        return options, proxy
+
+    def init_webdriver(self, proxy=None, user_agent=None):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        options, proxy = self.chrome_options(proxy, user_agent)
         
         try:
-            service = Service(ChromeDriverManager().install())
+            service = Service(chromedriver_path())
             driver = webdriver.Chrome(service=service, options=options)
             
-            # Add human-like behavior
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            # Add human-like behavior, on every document rather than just the first
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': STEALTH_SCRIPT})
+            driver.execute_script(STEALTH_SCRIPT)
+            self.apply_lean_profile(driver)
             
+            with self.lock:
+                self._drivers.append(driver)
+            self.browsers.track(driver, proxy)
             logging.info("WebDriver initialized successfully")
             return driver
         except Exception as e:
             logging.error(f"WebDriver initialization failed: {str(e)}")
             raise
+
+    def apply_lean_profile(self, driver):
+        if not self.blocked_patterns:
+            return
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_patterns})
+        except Exception as e:
+            logging.warning(f"Could not install resource blocklist: {str(e)}")
+    
+    def init_session(self):
+        session = requests.Session()
+        pool_size = max(self.workers * 2, self.validation_workers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
     
     def rotate_proxy(self):
-        if not self.proxies:
+        # With no browser launched yet there is nothing to move; the first one picks its own proxy
+        if not self.proxies or self.active_driver is None:
             return
             
         try:
-            self.driver.quit()
-            proxy = random.choice(self.proxies)
-            options = Options()
-            options.add_argument("--headless")
-            options.add_argument(f'--proxy-server={proxy}')
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--no-sandbox")
-            
-            if self.user_agents:
-                options.add_argument(f"user-agent={random.choice(self.user_agents)}")
-                
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=options)
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            # Move to a warm browser on another proxy; the current one stays warm for its own proxy
+            current = self.browsers.proxy_of(self.driver)
+            proxy = self.proxy_manager.choose(exclude={current})
+            ua = random.choice(self.user_agents) if self.user_agents else None
+            self.driver = self.browsers.switch(self.driver, proxy, ua)
             logging.info(f"Rotated to proxy: {proxy}")
         except Exception as e:
             logging.error(f"Proxy rotation failed: {str(e)}")
         
     def rotate_user_agent(self):
-        if not self.user_agents:
+        if not self.user_agents or self.active_driver is None:
             return
             
         try:
@@ -153,177 +2121,456 @@ class CompanyScraper:
             logging.error(f"User agent rotation failed: {str(e)}")
         
     def validate_url(self, url):
+        parsed = urlparse(url)
+        if not parsed.scheme:
+            url = "https://" + url
+        key = normalize_url(url)
+        
+        with self.lock:
+            cached = self.validation_cache.get(key)
+        if cached and cached['expires'] > time.time():
+            return cached['valid'], url
+            
+        proxy = self.proxy_manager.choose()
+        started = time.time()
         try:
-            parsed = urlparse(url)
-            if not parsed.scheme:
-                url = "https://" + url
-                
             headers = {'User-Agent': random.choice(self.user_agents)} if self.user_agents else {}
-            proxies = {'https': random.choice(self.proxies)} if self.proxies else None
-            
-            response = requests.head(
-                url, 
-                headers=headers, 
-                proxies=proxies,
-                timeout=5, 
-                allow_redirects=True
-            )
-            return response.status_code == 200, url
+            
+            with self.metrics.timer('validate'):
+                response = self.session.head(
+                    url, 
+                    headers=headers, 
+                    proxies=self.proxy_manager.requests_proxies(proxy),
+                    timeout=5, 
+                    allow_redirects=True
+                )
         except Exception as e:
+            if isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                self.proxy_manager.record(proxy, False, time.time() - started)
+            self.metrics.inc('scraper_errors_total', stage='validate', category=error_category(e))
             logging.error(f"URL validation error: {str(e)}")
             return False, url
+        self.proxy_manager.record(proxy, True, time.time() - started, looks_blocked(response.status_code))
+            
+        entry = {
+            'valid': response.status_code == 200,
+            'status': response.status_code,
+            'final_url': response.url,
+            'expires': time.time() + self.validation_ttl
+        }
+        with self.lock:
+            self.validation_cache[key] = entry
+            self.validation_cache.setdefault(normalize_url(response.url), entry)
+        return entry['valid'], url
+
+    def validate_urls(self, urls):
+        unique = list(dict.fromkeys(urls))
+        if not unique:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.validation_workers, len(unique))) as pool:
+            results = dict(zip(unique, pool.map(self.validate_url, unique)))
+        return [results[url] for url in urls]
             
-    def get_search_results(self, query, pages=3, max_retries=3):
-        urls = []
+    def get_search_results(self, query, pages=3, max_retries=3, limit=None):
+        return [url for batch in self.iter_search_pages(query, pages, max_retries, limit) for url in batch]
+
+    def iter_search_pages(self, query, pages=3, max_retries=3, limit=None):
+        # Yields each results page's new, validated URLs as soon as that page is parsed, so
+        # scraping can start while later pages load; stops early once `limit` URLs were found
+        seen = set()
+        found = 0
         for page in range(pages):
+            if self.cancel_event.is_set() or (limit and found >= limit):
+                break
             for attempt in range(max_retries):
                 try:
-                    start = page * 10
-                    search_url = f"https://www.bing.com/search?q={query}&first={start}"
                     logging.info(f"Searching: {query} (page {page+1}, attempt {attempt+1})")
+                    candidates, cached = self.search_page(query, page)
                     
-                    # Add human-like delay
-                    time.sleep(random.uniform(1.5, 3.5))
-                    
-                    self.driver.get(search_url)
-                    
-                    # Human-like interactions
-                    actions = ActionChains(self.driver)
-                    actions.move_by_offset(random.randint(10, 100), random.randint(10, 100)).perform()
-                    
-                    # Wait for results to load
-                    try:
-                        WebDriverWait(self.driver, 15).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "ol#b_results"))
-                        )
-                    except TimeoutException:
-                        logging.warning("Timed out waiting for search results")
-                        raise
-                    
-                    # Check for CAPTCHA
-                    page_text = self.driver.page_source.lower()
-                    if "captcha" in page_text or "sorry" in page_text or "security check" in page_text:
-                        logging.warning("Search engine detection triggered")
-                        raise Exception("Search engine anti-bot detection triggered")
-                    
-                    soup = BeautifulSoup(self.driver.page_source, 'html.parser')
                     new_urls = []
-                    
-                    # Bing search result extraction
-                    for result in soup.select("ol#b_results li.b_algo h2 a"):
-                        try:
-                            href = result.get('href')
-                            if href and urlparse(href).netloc:
-                                valid, clean_url = self.validate_url(href)
-                                if valid and clean_url not in urls:
-                                    new_urls.append(clean_url)
-                        except Exception as e:
-                            logging.warning(f"URL extraction error: {str(e)}")
+                    for valid, clean_url in self.validate_urls(candidates):
+                        key = normalize_url(clean_url)
+                        if valid and key not in seen:
+                            seen.add(key)
+                            new_urls.append(clean_url)
+                    if limit:
+                        new_urls = new_urls[:limit - found]
                     
                     if not new_urls:
-                        if attempt < max_retries - 1:
+                        if attempt < max_retries - 1 and not cached:
                             raise Exception("No valid URLs extracted")
                         else:
                             logging.warning(f"No URLs found on page {page+1}")
                     
-                    urls.extend(new_urls)
+                    found += len(new_urls)
                     logging.info(f"Found {len(new_urls)} URLs on page {page+1}")
-                    
-                    # Scroll and random mouse movement
-                    self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight)")
-                    actions.move_by_offset(random.randint(-50, 50), random.randint(-50, 50)).perform()
-                    time.sleep(random.uniform(0.8, 2.0))
+                    if new_urls:
+                        yield new_urls
+                    if limit and found >= limit:
+                        logging.info(f"Reached {limit} search results, not loading further pages")
+                        return
+                    if not cached:
+                        self.searcher.pause()
                     break
                 except Exception as e:
                     self.errors += 1
+                    self.metrics.inc('scraper_errors_total', stage='search', category=error_category(e))
                     logging.warning(f"Attempt {attempt+1} failed: {str(e)}")
                     if attempt < max_retries - 1:
                         logging.info("Retrying...")
                         self.rotate_user_agent()
                         self.rotate_proxy()
-                        time.sleep(5 * (attempt + 1))
+                        with self.metrics.timer('retry_sleep'):
+                            time.sleep(5 * (attempt + 1))
                     else:
                         logging.error(f"Failed page {page+1} after {max_retries} attempts")
-        
-        return [url for url in urls if self.validate_url(url)[0]]
+
+    def search_page(self, query, page):
+        # Result URLs of one results page, from the cache while it is fresh so repeated
+        # queries never reach the search engine
+        key = f"search:{self.search_backend}:{' '.join(query.lower().split())}:{page}"
+        entry = self.cache.get(key) if self.cache else None
+        if entry and self.cache.is_fresh(entry, self.search_cache_ttl):
+            self.metrics.inc('scraper_search_cache_total', result='hit')
+            return json.loads(entry['body']), True
+        self.metrics.inc('scraper_search_cache_total', result='miss')
+        candidates = self.searcher.results_page(query, page * 10)
+        if self.cache and candidates:
+            self.cache.put(key, json.dumps(candidates), tier='search')
+        return candidates, False
+
+    def scrape_search(self, query, pages=3, level='basic', depth=0, on_progress=None, limit=None,
+                      url_queue=None, urls=(), start_depths=None):
+        # urls are already known results, e.g. those journaled before a resumed search was cut short
+        found = []
+        def feed():
+            for batch in self.iter_search_pages(query, pages, limit=limit):
+                found.extend(batch)
+                yield batch
+            if self.journal is not None and not self.cancel_event.is_set():
+                self.journal.mark_searched(self.job_id)
+        if url_queue is not None:
+            self.coordinate(url_queue, list(urls), level, depth, on_progress, feed=feed())
+        else:
+            self.scrape_urls(list(urls), level, depth, on_progress, start_depths, feed=feed())
+        return found
+
+    def open_queue(self):
+        return UrlQueue(self.queue_path, self.queue_lease_seconds, self.queue_max_attempts)
+
+    def coordinate(self, url_queue, urls, level='basic', depth=0, on_progress=None, feed=None):
+        # Distributed mode: the job's frontier and results live in url_queue and worker
+        # processes do the scraping; this node seeds the queue and collects their records
+        job_id = self.job_id or uuid.uuid4().hex[:12]
+        cursor = 0
+        if url_queue.create_job(job_id, level, depth, self.max_pages_per_domain):
+            # Resumed: records already reported were journaled, or belong to URLs queued again here
+            cursor = url_queue.last_record(job_id)
+            url_queue.retry(job_id, urls)
+        else:
+            url_queue.add(job_id, urls)
+        feeding = threading.Event()
+
+        def produce():
+            try:
+                for batch in feed:
+                    if self.cancel_event.is_set():
+                        break
+                    url_queue.add(job_id, batch)
+            except Exception as e:
+                logging.error(f"URL feed failed: {str(e)}")
+            finally:
+                if self.active_driver is not None:
+                    self.browsers.release(self.active_driver)
+                    self.driver = None
+                feeding.clear()
+
+        def collect(cursor):
+            while True:
+                batch = url_queue.records(job_id, cursor)
+                if not batch:
+                    return cursor
+                for cursor, record in batch:
+                    with self.lock:
+                        # A record replayed from the journal on resume is not stored twice
+                        if record['url'] in self.visited_urls:
+                            continue
+                        self.visited_urls.add(record['url'])
+                    self.store_record(record, error=str(record.get('status', '')).startswith('error'))
+
+        def plan(planned):
+            # Seeds, fed batches and the links workers find are journaled so a resume sees them all
+            while self.journal is not None:
+                rows = url_queue.urls(job_id, planned)
+                if not rows:
+                    break
+                by_depth = {}
+                for planned, url, url_depth in rows:
+                    by_depth.setdefault(url_depth, []).append(url)
+                for url_depth, batch in by_depth.items():
+                    self.journal.plan(self.job_id, batch, url_depth)
+            return planned
+
+        if feed is not None:
+            feeding.set()
+            threading.Thread(target=produce, daemon=True).start()
+        logging.info(f"Coordinating job {job_id}: workers lease URLs from {self.queue_path}")
+        planned = 0
+        status = 'completed'
+        try:
+            while True:
+                # Read before the counts, so a batch fed in between is not mistaken for the end
+                draining = not feeding.is_set()
+                planned = plan(planned)
+                cursor = collect(cursor)
+                counts = url_queue.counts(job_id)
+                if on_progress:
+                    on_progress(counts['done'] + counts['failed'], sum(counts.values()))
+                if self.cancel_event.is_set():
+                    status = 'cancelled'
+                    break
+                if draining and not counts['pending'] and not counts['leased']:
+                    # Records reported after the read above
+                    collect(cursor)
+                    break
+                time.sleep(self.queue_poll_interval)
+        finally:
+            url_queue.set_status(job_id, status)
+        if counts['failed']:
+            logging.warning(f"{counts['failed']} URLs were abandoned after {url_queue.max_attempts} expired leases")
+            with self.lock:
+                self.errors += counts['failed']
         
     def extract_tech_stack(self, domain):
         if not self.builtwith_api:
             return ""
-            
-        try:
-            url = f"https://api.builtwith.com/v19/api.json?KEY={self.builtwith_api}&LOOKUP={domain}"
-            headers = {'User-Agent': random.choice(self.user_agents)} if self.user_agents else {}
-            proxies = {'https': random.choice(self.proxies)} if self.proxies else None
-            
-            response = requests.get(url, headers=headers, proxies=proxies, timeout=15)
-            if response.status_code == 200:
-                data = response.json()
-                tech = []
-                for result in data.get('Results', []):
-                    for path in result.get('Result', {}).get('Paths', []):
-                        for tech_group in path.get('Technologies', []):
-                            tech.append(tech_group.get('Name', ''))
-                return ", ".join(filter(None, tech))
-            else:
-                logging.warning(f"BuiltWith API returned status {response.status_code}")
-        except Exception as e:
-            logging.error(f"BuiltWith API error: {str(e)}")
-        return ""
+        return self.builtwith.lookup(domain).result()
         
     def extract_emails(self, text):
-        if not text:
-            return ""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        return ", ".join(sorted(set(emails))) if emails else ""
+        return find_emails(text)
         
     def extract_phones(self, text):
-        phone_pattern = r'(\+\d{1,2}\s?)?(\(\d{3}\)|\d{3})[\s.-]?\d{3}[\s.-]?\d{4}\b'
-        phones = re.findall(phone_pattern, text)
-        cleaned_phones = ["".join(filter(None, phone)).strip() for phone in phones]
-        return ", ".join(set(cleaned_phones)) if cleaned_phones else ""
+        return find_phones(text)
         
-    def extract_using_selectors(self, soup, selector_type):
-        results = []
-        selectors = self.selectors.get(selector_type, [])
-        if self.cli_selectors and selector_type in self.cli_selectors:
-            selectors = self.cli_selectors[selector_type]
+    def compile_plan(self):
+        selectors = {**self.selectors, **getattr(self, 'cli_selectors', {})}
+        return ExtractionPlan(selectors, fuse_regex=self.fuse_regex, max_scan_chars=self.max_scan_chars)
+
+    def set_cli_selectors(self, selectors):
+        self.cli_selectors = selectors
+        self.plan = self.compile_plan()
+        
+    def extract_using_selectors(self, doc, selector_type):
+        return self.plan.select(doc, selector_type)
+        
+    def record_fetch(self, tier, elapsed, size=0):
+        with self.lock:
+            self.fetch_stats[tier]['count'] += 1
+            self.fetch_stats[tier]['seconds'] += elapsed
+        self.metrics.observe('scraper_stage_seconds', elapsed, stage=f"fetch_{tier}")
+        if size:
+            self.metrics.inc('scraper_bytes_fetched_total', size, tier=tier)
+
+    def record_cache(self, outcome):
+        with self.lock:
+            self.fetch_stats['cache'][outcome] += 1
+
+    def fetch_summary(self):
+        with self.lock:
+            summary = {
+                'escalated': self.fetch_stats['escalated'],
+                'cache': dict(self.fetch_stats['cache']),
+                'builtwith': dict(self.builtwith.stats)
+            }
+            for tier in ('http', 'browser'):
+                count = self.fetch_stats[tier]['count']
+                seconds = self.fetch_stats[tier]['seconds']
+                summary[tier] = {
+                    'count': count,
+                    'avg_latency': round(seconds / count, 3) if count else 0.0
+                }
+            browser = self.fetch_stats['browser']
+            if browser['count']:
+                summary['browser']['avg_bytes'] = browser['bytes'] // browser['count']
+                summary['browser']['avg_blocked'] = round(browser['blocked'] / browser['count'], 1)
+        # Pages served over HTTP would otherwise have cost an average browser load each
+        browser_avg = summary['browser']['avg_latency']
+        if browser_avg:
+            saved = summary['http']['count'] * (browser_avg - summary['http']['avg_latency'])
+            summary['browser_seconds_saved'] = round(max(saved, 0.0), 1)
+        return summary
+
+    def needs_browser(self, doc):
+        return page_needs_browser(doc, self.plan, self.min_text_length)
+
+    def fetch_http(self, url, cached=None):
+        started = time.time()
+        proxy = self.proxy_manager.choose()
+        size = 0
+        try:
+            headers = {'User-Agent': random.choice(self.user_agents)} if self.user_agents else {}
+            if cached and cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached and cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+            response = self.session.get(url, headers=headers, proxies=self.proxy_manager.requests_proxies(proxy), timeout=15)
+            size = len(response.content)
+            decode_html(response)
+            blocked = looks_blocked(response.status_code, response.text)
+            self.proxy_manager.record(proxy, True, time.time() - started, blocked)
+            if blocked or response.status_code >= 400:
+                self.metrics.inc('scraper_errors_total', stage='fetch_http',
+                                 category='blocked' if blocked else 'http_status')
+            return response
+        except Exception as e:
+            if isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                self.proxy_manager.record(proxy, False, time.time() - started)
+            self.metrics.inc('scraper_errors_total', stage='fetch_http', category=error_category(e))
+            logging.debug(f"HTTP fetch failed for {url}: {str(e)}")
+            raise
+        finally:
+            self.record_fetch('http', time.time() - started, size)
+
+    def page_ready(self, driver):
+        # Content selectors present means the page is usable even if scripts are still running
+        xpath = self.plan.ready_xpath('company_name')
+        if xpath:
+            try:
+                if driver.execute_script(READY_SCRIPT, xpath):
+                    return True
+            except WebDriverException:
+                pass
+        return driver.execute_script("return document.readyState") == 'complete'
+
+    def drain_performance_log(self):
+        # Reading the log empties it; returns how many requests the blocklist stopped since the last read
+        blocked = 0
+        if self.blocked_patterns:
+            try:
+                for entry in self.driver.get_log('performance'):
+                    message = json.loads(entry['message'])['message']
+                    if message.get('method') == 'Network.loadingFailed' and message['params'].get('blockedReason') == 'inspector':
+                        blocked += 1
+            except Exception:
+                pass
+        return blocked
+
+    def record_page_weight(self, url, elapsed):
+        try:
+            transferred = int(self.driver.execute_script(TRANSFER_SIZE_SCRIPT) or 0)
+        except WebDriverException:
+            transferred = 0
+        blocked = self.drain_performance_log()
+        with self.lock:
+            self.fetch_stats['browser']['bytes'] += transferred
+            self.fetch_stats['browser']['blocked'] += blocked
+        self.metrics.inc('scraper_bytes_fetched_total', transferred, tier='browser')
+        self.metrics.inc('scraper_blocked_requests_total', blocked)
+        logging.debug(f"{url}: {transferred} bytes transferred, {blocked} requests blocked, ready in {elapsed:.2f}s")
+
+    def fetch_browser(self, url):
+        from selenium.webdriver.common.action_chains import ActionChains
+        from selenium.webdriver.support.ui import WebDriverWait
+        # Launching this thread's browser on first use is not part of the page's fetch time
+        self.driver
+        started = time.time()
+        try:
+            self.driver.get(url)
+            
+            # Human-like interactions
+            actions = ActionChains(self.driver)
+            actions.move_by_offset(random.randint(10, 50), random.randint(10, 50)).perform()
             
-        for selector in selectors:
+            proxy = self.browsers.proxy_of(self.driver)
             try:
-                if selector.startswith('//'):
-                    elements = self.driver.find_elements(By.XPATH, selector.split('@')[0])
-                    for element in elements:
-                        if '@content' in selector:
-                            results.append(element.get_attribute('content').strip())
-                        elif '@href' in selector:
-                            results.append(element.get_attribute('href').strip())
-                        else:
-                            results.append(element.text.strip())
-                elif selector.startswith('regex:'):
-                    pattern = selector.split('regex:', 1)[1].strip()
-                    matches = re.findall(pattern, str(soup))
-                    results.extend(matches)
-                else:
-                    elements = soup.select(selector)
-                    for element in elements:
-                        if 'meta' in selector:
-                            results.append(element.get('content', '').strip())
-                        elif element.text.strip():
-                            results.append(element.text.strip())
-            except Exception as e:
-                logging.warning(f"Selector error ({selector}): {str(e)}")
-                
-        return ", ".join(filter(None, set(results)))
+                WebDriverWait(self.driver, self.page_load_timeout, poll_frequency=0.2).until(self.page_ready)
+            except TimeoutException:
+                self.proxy_manager.record(proxy, False, time.time() - started)
+                logging.warning(f"Timed out loading page: {url}")
+                raise
+            html = self.driver.page_source
+            blocked = looks_blocked(None, html)
+            self.proxy_manager.record(proxy, True, time.time() - started, blocked)
+            if blocked:
+                self.metrics.inc('scraper_errors_total', stage='fetch_browser', category='blocked')
+            self.record_page_weight(url, time.time() - started)
+            self.driver = self.browsers.page_done(self.driver)
+            return html
+        except Exception as e:
+            self.metrics.inc('scraper_errors_total', stage='fetch_browser', category=error_category(e))
+            # A failed load's events would otherwise pile up until, and be counted against, the next page
+            if self.active_driver is not None:
+                self.drain_performance_log()
+            raise
+        finally:
+            self.record_fetch('browser', time.time() - started)
+
+    def fetch_source(self, url):
+        cached = self.cache.get(url) if self.cache else None
+        if cached and self.cache.is_fresh(cached):
+            self.record_cache('hits')
+            return cached['body'], 'cache', {}
+        if self.fetch_mode == 'browser' and not cached:
+            return self.fetch_browser(url), 'browser', {}
         
-    def scrape_page(self, url, level='basic'):
-        if url in self.visited_urls:
-            return
-        self.visited_urls.add(url)
+        try:
+            response = self.fetch_http(url, cached)
+        except Exception:
+            # In browser mode the request only revalidated the cache; the browser load still stands
+            if self.fetch_mode != 'browser':
+                raise
+            response = None
+        if response is not None and response.status_code == 304 and cached:
+            self.cache.refresh(url)
+            self.record_cache('revalidated')
+            return cached['body'], 'cache', {}
         
-        logging.info(f"Scraping: {url}")
-        company_data = {
+        validators = {}
+        if response is not None:
+            validators = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+        if self.fetch_mode == 'browser':
+            return self.fetch_browser(url), 'browser', validators
+        
+        # Only an anti-bot block is worth a browser load; missing pages and server errors are recorded as such
+        if looks_blocked(response.status_code, response.text):
+            if self.fetch_mode == 'auto':
+                return self.fetch_escalated(url, validators)
+            raise requests.HTTPError(f"HTTP {response.status_code}: blocked", response=response)
+        if response.status_code != 200:
+            raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+        content_type = response.headers.get('Content-Type', 'text/html')
+        if 'html' not in content_type:
+            raise ValueError(f"Unsupported content type: {content_type}")
+        # Whether the page needs JavaScript is decided by whoever parses it
+        return response.text, 'http', validators
+
+    def fetch_escalated(self, url, validators):
+        with self.lock:
+            self.fetch_stats['escalated'] += 1
+        logging.debug(f"Escalating to browser: {url}")
+        return self.fetch_browser(url), 'browser', validators
+
+    def cache_source(self, url, html, tier, validators):
+        if self.cache and tier != 'cache':
+            self.cache.put(url, html, tier=tier, **validators)
+
+    def fetch_page(self, url):
+        html, tier, validators = self.fetch_source(url)
+        with self.metrics.timer('parse'):
+            doc = PageDocument(html)
+            escalate = tier == 'http' and self.fetch_mode == 'auto' and self.needs_browser(doc)
+        if escalate:
+            html, tier, validators = self.fetch_escalated(url, validators)
+            with self.metrics.timer('parse'):
+                doc = PageDocument(html)
+        self.cache_source(url, html, tier, validators)
+        return html, doc, tier
+        
+    def new_record(self, url):
+        return {
             'url': url,
             'name': '',
             'website': '',
@@ -338,85 +2585,389 @@ class CompanyScraper:
             'scrape_time': datetime.now().isoformat(),
             'status': 'success'
         }
+
+    def claim_url(self, url):
+        with self.lock:
+            if url in self.visited_urls:
+                return False
+            self.visited_urls.add(url)
+            return True
+
+    def scrape_page(self, url, level='basic'):
+        if not self.claim_url(url):
+            return
+        
+        logging.info(f"Scraping: {url}")
+        company_data = self.new_record(url)
         
         try:
-            # Add random delay before request
-            time.sleep(random.uniform(self.min_delay, self.max_delay))
-            
-            self.driver.get(url)
-            
-            # Human-like interactions
-            actions = ActionChains(self.driver)
-            actions.move_by_offset(random.randint(10, 50), random.randint(10, 50)).perform()
-            
-            try:
-                WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.TAG_NAME, 'body'))
-                )
-            except TimeoutException:
-                logging.warning(f"Timed out loading page: {url}")
-                raise
+            domain = registered_domain(url)
+            # Start the tech stack lookup so it overlaps with the page load
+            tech_stack = self.builtwith.lookup(domain) if level == 'advanced' and self.builtwith_api else None
             
-            domain = extract(url).registered_domain
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            page_text = soup.get_text()
+            html, doc, tier = self.fetch_page(url)
             
-            company_data['name'] = self.extract_using_selectors(soup, 'company_name') or domain
+            with self.metrics.timer('extract'):
+                company_data.update(self.plan.extract(doc, level))
+            company_data['name'] = company_data['name'] or domain
             company_data['website'] = domain
-            company_data['email'] = self.extract_emails(page_text)
-            company_data['phone'] = self.extract_phones(page_text)
-            
-            if level in ('medium', 'advanced'):
-                company_data['description'] = self.extract_using_selectors(soup, 'description')
-                company_data['address'] = self.extract_using_selectors(soup, 'address')
-                
-                social_links = self.extract_using_selectors(soup, 'social').split(", ")
-                for link in social_links:
-                    if 'linkedin.com' in link: company_data['linkedin'] = link
-                    if 'twitter.com' in link: company_data['twitter'] = link
-                    if 'facebook.com' in link: company_data['facebook'] = link
             
-            if level == 'advanced':
-                company_data['tech_stack'] = self.extract_tech_stack(domain)
+            if tech_stack:
+                with self.metrics.timer('builtwith_wait'):
+                    company_data['tech_stack'] = tech_stack.result()
             
-            self.data.append(company_data)
+            self.store_record(company_data)
+            self.metrics.inc('scraper_pages_total', tier=tier, status='success')
             logging.info(f"Extracted data from {url}")
+            return doc
             
         except Exception as e:
             logging.error(f"Error scraping {url}: {str(e)}")
+            self.metrics.inc('scraper_pages_total', tier='none', status='error')
+            self.metrics.inc('scraper_errors_total', stage='scrape', category=error_category(e))
             company_data['status'] = f"error: {str(e)}"
-            self.data.append(company_data)
-            self.errors += 1
+            self.store_record(company_data, error=True)
             self.rotate_proxy()
         
-        # Add random delay after request
-        time.sleep(random.uniform(self.min_delay, self.max_delay))
-        
-    def discover_urls(self, seed_url, depth=1):
-        if depth <= 0:
-            return
-            
+    def store_record(self, company_data, error=False):
+        with self.lock:
+            self.record_count += 1
+            if error:
+                self.errors += 1
+            if self.sink is None:
+                self.data.append(company_data)
+        with self.metrics.timer('store'):
+            if self.sink is not None:
+                self.sink.write(company_data)
+            if self.journal is not None:
+                self.journal.complete(self.job_id, company_data)
+            if self.on_record is not None:
+                self.on_record(company_data)
+
+    def attach_journal(self, journal, job_id):
+        self.journal = journal
+        self.job_id = job_id
+
+    def replay_records(self, records):
+        # Records restored from the journal skip journaling and error counting
+        for record in records:
+            with self.lock:
+                self.record_count += 1
+                self.visited_urls.add(record['url'])
+            if self.sink is not None:
+                self.sink.write(record)
+            else:
+                self.data.append(record)
+
+    def open_sink(self, format='csv', filename='output'):
+        sink_class = SINKS.get(format)
+        if not sink_class:
+            raise ValueError(f"Unsupported export format: {format}")
+        batch_size = self.row_group_size if format in ('parquet', 'arrow') else self.sink_batch_size
+        self.sink = sink_class(filename, batch_size, self.columnar_compression)
+        logging.info(f"Streaming records to {self.sink.path}")
+        return self.sink.path
+
+    def close_sink(self):
+        if self.sink is None:
+            return None
+        sink, self.sink = self.sink, None
+        with self.metrics.timer('export'):
+            sink.close()
+        logging.info(f"Exported {sink.count} records to {sink.path}")
+        return sink.path
+
+    def launch_driver(self):
+        with self.lock:
+            index = len(self._drivers)
+        proxy = self.proxy_manager.choose()
+        ua = self.user_agents[index % len(self.user_agents)] if self.user_agents else None
+        return self.browsers.acquire(proxy, ua)
+
+    def checkout_driver(self):
+        # Only browsers that already exist are handed out; a worker whose page needs one
+        # and gets None launches it through the driver property
+        try:
+            return self._idle_drivers.get_nowait()
+        except queue.Empty:
+            return None
+
+    def run_in_worker(self, func, *args):
+        self.driver = self.checkout_driver()
         try:
-            self.driver.get(seed_url)
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+            return func(*args)
+        finally:
+            if self.active_driver is not None:
+                self._idle_drivers.put(self.active_driver)
+            self.driver = None
+
+    def scrape_task(self, url, level, follow_links):
+        doc = self.scrape_page(url, level)
+        if doc is None or not follow_links:
+            return []
+        # Links come from the page already fetched for extraction
+        with self.metrics.timer('links'):
+            return same_domain_links(doc, url)
+
+    def fetch_task(self, func, *args):
+        try:
+            return func(*args)
+        except Exception:
+            self.rotate_proxy()
+            raise
+
+    async def fetch_stage(self, url, level, follow_links, fetch):
+        # Fetch workers only move bytes; the page is handed on for the process pool to parse
+        if not self.claim_url(url):
+            return None
+        logging.info(f"Scraping: {url}")
+        page = {'url': url, 'level': level, 'follow_links': follow_links, 'record': self.new_record(url)}
+        try:
+            domain = registered_domain(url)
+            page['tech_stack'] = self.builtwith.lookup(domain) if level == 'advanced' and self.builtwith_api else None
+            page['html'], page['tier'], page['validators'] = await fetch(self.fetch_task, self.fetch_source, url)
+            page['queued'] = time.perf_counter()
+            return page
+        except Exception as e:
+            self.store_failure(page['record'], e)
+            return None
+
+    async def extract_stage(self, page, fetch):
+        url, level, follow_links = page['url'], page['level'], page['follow_links']
+        company_data = page['record']
+        self.metrics.observe('scraper_stage_seconds', time.perf_counter() - page['queued'], stage='extraction_queue')
+        try:
+            html, tier, validators = page['html'], page['tier'], page['validators']
+            check = self.min_text_length if tier == 'http' and self.fetch_mode == 'auto' else None
+            result = await asyncio.wrap_future(
+                self.extractor.submit(extract_page, html, url, level, check, follow_links)
+            )
+            self.observe_extraction(result)
+            if result['needs_browser']:
+                html, tier, validators = await fetch(self.fetch_task, self.fetch_escalated, url, validators)
+                result = await asyncio.wrap_future(
+                    self.extractor.submit(extract_page, html, url, level, None, follow_links)
+                )
+                self.observe_extraction(result)
+            self.cache_source(url, html, tier, validators)
+            
+            domain = registered_domain(url)
+            company_data.update(result['fields'])
+            company_data['name'] = company_data['name'] or domain
+            company_data['website'] = domain
+            if page['tech_stack']:
+                with self.metrics.timer('builtwith_wait'):
+                    company_data['tech_stack'] = await asyncio.wrap_future(page['tech_stack'])
+            
+            self.store_record(company_data)
+            self.metrics.inc('scraper_pages_total', tier=tier, status='success')
+            logging.info(f"Extracted data from {url}")
+            return result['links']
             
-            for link in soup.find_all('a', href=True):
-                href = link.get('href')
-                if href:
-                    full_url = urljoin(seed_url, href)
-                    if extract(full_url).registered_domain == extract(seed_url).registered_domain:
-                        if full_url not in self.visited_urls:
-                            self.scrape_page(full_url)
-                            self.discover_urls(full_url, depth-1)
         except Exception as e:
-            logging.error(f"URL discovery error: {str(e)}")
-            self.errors += 1
+            self.store_failure(company_data, e)
+            return []
+
+    def store_failure(self, company_data, e):
+        logging.error(f"Error scraping {company_data['url']}: {str(e)}")
+        self.metrics.inc('scraper_pages_total', tier='none', status='error')
+        self.metrics.inc('scraper_errors_total', stage='scrape', category=error_category(e))
+        company_data['status'] = f"error: {str(e)}"
+        self.store_record(company_data, error=True)
+
+    def observe_extraction(self, result):
+        # Timed inside the worker process, recorded here
+        for stage, elapsed in result.get('timings', {}).items():
+            self.metrics.observe('scraper_stage_seconds', elapsed, stage=stage)
+
+    def start_extractor(self):
+        if not self.extraction_processes:
+            return None
+        selectors = {**self.selectors, **self.cli_selectors}
+        # By now the fetch and Flask threads are running, and forking them can copy a held lock into the
+        # child; workers start from a clean forkserver instead (spawn where that is unavailable)
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        return ProcessPoolExecutor(
+            max_workers=self.extraction_processes,
+            mp_context=multiprocessing.get_context(method),
+            initializer=init_extraction_worker,
+            initargs=(selectors, self.fuse_regex, self.max_scan_chars)
+        )
+
+    def scrape_urls(self, urls, level='basic', depth=0, on_progress=None, start_depths=None, feed=None):
+        self.plan_urls(urls, level)
+        # The calling thread's browser, if it has launched one, joins the pool as the first worker
+        self._idle_drivers = queue.Queue()
+        if self.active_driver is not None:
+            self._idle_drivers.put(self.active_driver)
+        self.extractor = self.start_extractor()
+        try:
+            asyncio.run(self.crawl(urls, level, depth, on_progress, start_depths, feed))
+        finally:
+            if self.extractor is not None:
+                self.extractor.shutdown()
+                self.extractor = None
+            drivers = []
+            while not self._idle_drivers.empty():
+                drivers.append(self._idle_drivers.get_nowait())
+            self.driver = drivers[0] if drivers else None
+            for driver in drivers[1:]:
+                self.browsers.release(driver)
+
+    def plan_urls(self, urls, level):
+        if self.journal is not None:
+            self.journal.plan(self.job_id, urls)
+        if level == 'advanced' and self.builtwith_api:
+            self.builtwith.prefetch(registered_domain(url) for url in urls)
+
+    def hand_off_driver(self):
+        # A producer thread's browser is finished with and becomes available to crawl workers
+        if self.active_driver is not None:
+            self._idle_drivers.put(self.active_driver)
+            self.driver = None
+
+    async def crawl(self, urls, level='basic', depth=0, on_progress=None, start_depths=None, feed=None):
+        loop = asyncio.get_running_loop()
+        frontier = CrawlFrontier(self.max_pages_per_domain)
+        for url in list(self.visited_urls):
+            frontier.mark_seen(url)
+        already_seen = frontier.accepted
+        start_depths = start_depths or {}
+        for url in interleave_by_domain(urls):
+            frontier.add(url, start_depths.get(url, 0))
+        changed = asyncio.Condition()
+        domain_locks = {}
+        progress = {'completed': 0, 'in_flight': 0, 'feeding': feed is not None}
+
+        async def produce():
+            # Batches of seed URLs (a results page each, for searches) join the frontier as
+            # they arrive. The feed runs on its own thread, which keeps any browser it uses.
+            batches = iter(feed)
+            try:
+                while not self.cancel_event.is_set():
+                    batch = await loop.run_in_executor(feeder, next, batches, None)
+                    if batch is None:
+                        break
+                    self.plan_urls(batch, level)
+                    async with changed:
+                        for url in interleave_by_domain(batch):
+                            frontier.add(url, start_depths.get(url, 0))
+                        changed.notify_all()
+                    if on_progress:
+                        on_progress(progress['completed'], frontier.accepted - already_seen)
+            except Exception as e:
+                logging.error(f"URL feed failed: {str(e)}")
+            finally:
+                # Closing the feed lets a search stopped early release its browser state
+                if hasattr(batches, 'close'):
+                    await loop.run_in_executor(feeder, batches.close)
+                await loop.run_in_executor(feeder, self.hand_off_driver)
+                async with changed:
+                    progress['feeding'] = False
+                    changed.notify_all()
+
+        def fetcher(domain, cached=False):
+            lock = domain_locks.setdefault(domain, asyncio.Lock())
+            async def fetch(func, *args):
+                if cached:
+                    # A fresh cache hit never reaches the site, so it takes no rate-limit slot
+                    return await loop.run_in_executor(executor, self.run_in_worker, func, *args)
+                # One request in flight per domain, other domains overlap freely
+                async with lock:
+                    waited = await self.rate_limiter.acquire(domain)
+                    self.metrics.observe('scraper_stage_seconds', waited, stage='rate_limit_wait')
+                    try:
+                        return await loop.run_in_executor(executor, self.run_in_worker, func, *args)
+                    finally:
+                        self.rate_limiter.release(domain)
+            return fetch
+
+        async def finish(url_depth, links):
+            async with changed:
+                accepted = [link for link in links if frontier.add(link, url_depth + 1)]
+                if accepted and self.journal is not None:
+                    self.journal.plan(self.job_id, accepted, url_depth + 1)
+                progress['in_flight'] -= 1
+                progress['completed'] += 1
+                changed.notify_all()
+            if on_progress:
+                on_progress(progress['completed'], frontier.accepted - already_seen)
+
+        async def consume():
+            while True:
+                async with changed:
+                    while not frontier and (progress['in_flight'] or progress['feeding']):
+                        await changed.wait()
+                    if not frontier or self.cancel_event.is_set():
+                        return
+                    url, url_depth = frontier.pop()
+                    progress['in_flight'] += 1
+                    
+                links = []
+                handed_off = False
+                fetch = fetcher(registered_domain(url), self.cache is not None and self.cache.fresh(url))
+                try:
+                    if pages is not None:
+                        page = await self.fetch_stage(url, level, url_depth < depth, fetch)
+                        if page is not None:
+                            # Waits while the queue is full, so fetching stalls when extraction falls behind
+                            page['depth'] = url_depth
+                            await pages.put(page)
+                            handed_off = True
+                    else:
+                        links = await fetch(self.scrape_task, url, level, url_depth < depth)
+                except Exception as e:
+                    logging.error(f"Crawl task failed for {url}: {str(e)}")
+                finally:
+                    if not handed_off:
+                        await finish(url_depth, links)
+
+        async def extract():
+            while True:
+                page = await pages.get()
+                if page is None:
+                    return
+                links = []
+                try:
+                    links = await self.extract_stage(page, fetcher(registered_domain(page['url'])))
+                except Exception as e:
+                    logging.error(f"Crawl task failed for {page['url']}: {str(e)}")
+                finally:
+                    await finish(page['depth'], links)
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        feeder = ThreadPoolExecutor(max_workers=1) if feed is not None else None
+        # Pages fetched but not yet extracted; two extractors per process keep the pool busy
+        # while one of them waits on a browser re-fetch
+        pages = asyncio.Queue(self.extraction_queue_size) if self.extractor is not None else None
+        extractors = [asyncio.ensure_future(extract()) for _ in range(2 * self.extraction_processes)] \
+            if pages is not None else []
+        tasks = [consume() for _ in range(self.max_concurrency)]
+        if feed is not None:
+            tasks.append(produce())
+        try:
+            await asyncio.gather(*tasks)
+            # The fetch stage only stops once every page it handed on has been extracted
+            for _ in extractors:
+                await pages.put(None)
+            await asyncio.gather(*extractors)
+        finally:
+            for task in extractors:
+                task.cancel()
+            executor.shutdown(wait=True)
+            if feeder is not None:
+                feeder.shutdown(wait=True)
             
     def export_data(self, format='csv', filename='output'):
         if not self.data:
             logging.warning("No data to export")
             return
             
+        with self.metrics.timer('export'):
+            return self.write_export(format, filename)
+
+    def write_export(self, format, filename):
+        import pandas as pd
         df = pd.DataFrame(self.data)
         
         if format == 'csv':
@@ -425,12 +2976,12 @@ class CompanyScraper:
         elif format == 'json':
             output_path = f"{filename}.json"
             df.to_json(output_path, orient='records')
-        elif format == 'sqlite':
-            import sqlite3
-            output_path = f"{filename}.db"
-            conn = sqlite3.connect(output_path)
-            df.to_sql('companies', conn, if_exists='replace', index=False)
-            conn.close()
+        elif format in SINKS:
+            sink = SINKS[format](filename, self.row_group_size, self.columnar_compression)
+            for record in self.data:
+                sink.write(record)
+            sink.close()
+            output_path = sink.path
         else:
             logging.error("Unsupported export format")
             return
@@ -439,8 +2990,23 @@ class CompanyScraper:
         return output_path
         
     def close(self):
+        self.close_sink()
+        if self.active_driver is not None:
+            self.close_driver()
+        self.browsers.close()
+        self.builtwith.close()
+        self.session.close()
+        if self.cache:
+            self.cache.close()
+
+    def close_driver(self, driver=None):
+        driver = driver or self.active_driver
         try:
-            self.driver.quit()
+            with self.lock:
+                if driver in self._drivers:
+                    self._drivers.remove(driver)
+            self.browsers.forget(driver)
+            driver.quit()
             logging.info("WebDriver closed successfully")
         except Exception as e:
             logging.error(f"Error closing WebDriver: {str(e)}")
@@ -464,8 +3030,8 @@ class CompanyScraper:
             results['url_validation'] = valid
             
             self.driver.get("https://example.com")
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            title = self.extract_using_selectors(soup, 'company_name')
+            doc = PageDocument(self.driver.page_source)
+            title = self.extract_using_selectors(doc, 'company_name')
             results['selector_extraction'] = "Example Domain" in title
             
             logging.info("Tests completed successfully")
@@ -474,120 +3040,671 @@ class CompanyScraper:
             logging.error(f"Tests failed: {str(e)}")
             return results
 
-def run_scraping_job(args):
-    global current_job, scraping_status
+class QueueWorker:
+    # Leases URLs of distributed jobs, scrapes each with scrape_page and reports the record,
+    # and the links to follow, back to the queue. Installed as the scraper's sink, so records
+    # are handed over rather than written to a file.
+    path = 'queue'
+
+    def __init__(self, scraper, url_queue, worker_id=None):
+        self.scraper = scraper
+        self.queue = url_queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.reported = {}
+        self.count = 0
+        scraper.sink = self
+
+    def write(self, record):
+        self.reported[record['url']] = record
+        self.count += 1
+
+    def close(self):
+        pass
+
+    def run(self, threads=None, exit_when_idle=False):
+        threads = threads or self.scraper.workers
+        logging.info(f"Worker {self.worker_id} started with {threads} threads")
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = [pool.submit(self.loop, exit_when_idle) for _ in range(threads)]
+            try:
+                for future in futures:
+                    future.result()
+            except KeyboardInterrupt:
+                logging.info("Stopping once the pages in progress are reported")
+                self.scraper.cancel_event.set()
+        logging.info(f"Worker {self.worker_id} stopped after {self.count} pages")
+
+    def loop(self, exit_when_idle=False):
+        scraper = self.scraper
+        try:
+            while not scraper.cancel_event.is_set():
+                try:
+                    leases = self.queue.lease(self.worker_id)
+                    if not leases:
+                        if exit_when_idle and self.queue.idle():
+                            return
+                        scraper.cancel_event.wait(scraper.queue_poll_interval)
+                        continue
+                    for lease in leases:
+                        self.process(lease)
+                except Exception as e:
+                    logging.error(f"Worker loop error: {str(e)}")
+                    scraper.cancel_event.wait(scraper.queue_poll_interval)
+        finally:
+            if scraper.active_driver is not None:
+                scraper.browsers.release(scraper.active_driver)
+                scraper.driver = None
+
+    def process(self, lease):
+        scraper = self.scraper
+        url = lease['url']
+        # A lease can hand this worker a URL again after an earlier attempt timed out
+        with scraper.lock:
+            scraper.visited_urls.discard(url)
+        with scraper.rate_limiter.throttle(registered_domain(url)):
+            doc = scraper.scrape_page(url, lease['level'])
+        links = []
+        if doc is not None and lease['depth'] < lease['max_depth']:
+            with scraper.metrics.timer('links'):
+                links = same_domain_links(doc, url)
+        self.queue.complete(lease['job_id'], url, self.reported.pop(url, None), links, self.worker_id)
+
+class JobScheduler:
+    def __init__(self, run, capacity=4, default_workers=1, history=200):
+        self.run = run
+        self.capacity = max(1, int(capacity))
+        self.default_workers = default_workers
+        self.history = history
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.queue = []
+        self.counter = itertools.count()
+        self.in_use = 0
+        self.latest = None
+        from apscheduler.schedulers.background import BackgroundScheduler
+        self.timer = BackgroundScheduler(daemon=True)
+        self.schedules = {}
+
+    def submit(self, args, priority=0, schedule_id=None):
+        job_id = uuid.uuid4().hex[:12]
+        args = copy.copy(args)
+        # Jobs share the service's worker capacity, so no single job may ask for more than all of it
+        args.workers = min(max(1, int(getattr(args, 'workers', None) or self.default_workers or 1)), self.capacity)
+        if getattr(args, 'output', None):
+            args.output = f"{args.output}_{job_id}"
+        job = {
+            'args': args,
+            'workers': args.workers,
+            'cancel': threading.Event(),
+            'status': {
+                'id': job_id,
+                'status': 'queued',
+                'priority': priority,
+                'workers': args.workers,
+                'schedule_id': schedule_id,
+                'query': getattr(args, 'query', None),
+                'urls': getattr(args, 'urls', None),
+                'submitted_at': datetime.now().isoformat()
+            }
+        }
+        with self.lock:
+            self.jobs[job_id] = job
+            heapq.heappush(self.queue, (-priority, next(self.counter), job_id))
+            self.latest = job_id
+        logging.info(f"Queued job {job_id} (priority {priority}, {args.workers} workers)")
+        self.dispatch()
+        return job_id
+
+    def dispatch(self):
+        # Strict priority order: a large job at the head waits for capacity rather than being overtaken
+        starting = []
+        with self.lock:
+            while self.queue:
+                job = self.jobs.get(self.queue[0][2])
+                if job is None or job['status']['status'] != 'queued':
+                    heapq.heappop(self.queue)
+                    continue
+                if self.in_use + job['workers'] > self.capacity:
+                    break
+                heapq.heappop(self.queue)
+                self.in_use += job['workers']
+                job['status']['status'] = 'starting'
+                starting.append(job)
+        for job in starting:
+            thread = threading.Thread(target=self.execute, args=(job,), daemon=True)
+            thread.start()
+
+    def execute(self, job):
+        try:
+            self.run(job['args'], job_status=job['status'], cancel=job['cancel'], job_id=job['status']['id'])
+        except Exception as e:
+            logging.error(f"Job {job['status']['id']} crashed: {str(e)}")
+            job['status']['status'] = 'failed'
+            job['status']['message'] = str(e)
+        finally:
+            with self.lock:
+                self.in_use -= job['workers']
+                self.prune()
+            self.dispatch()
+
+    def prune(self):
+        finished = [job_id for job_id, job in self.jobs.items()
+                    if job['status']['status'] in ('completed', 'failed', 'cancelled')]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return False
+            state = job['status']['status']
+            if state == 'queued':
+                job['status']['status'] = 'cancelled'
+                job['status']['end_time'] = datetime.now().isoformat()
+            elif state in ('starting', 'running'):
+                job['cancel'].set()
+                job['status']['message'] = 'Cancelling'
+            else:
+                return False
+        logging.info(f"Cancelled job {job_id}")
+        return True
+
+    def status(self, job_id=None):
+        with self.lock:
+            job = self.jobs.get(job_id or self.latest)
+            return dict(job['status']) if job else None
+
+    def list(self):
+        with self.lock:
+            return [dict(job['status']) for job in self.jobs.values()]
+
+    def schedule(self, args, priority=0, cron=None, interval=None):
+        from apscheduler.triggers.cron import CronTrigger
+        from apscheduler.triggers.interval import IntervalTrigger
+        if cron:
+            trigger = CronTrigger.from_crontab(cron)
+        elif interval:
+            trigger = IntervalTrigger(seconds=float(interval))
+        else:
+            raise ValueError("A schedule needs a cron expression or an interval")
+        schedule_id = uuid.uuid4().hex[:12]
+        self.timer.add_job(self.submit, trigger, args=(args, priority, schedule_id), id=schedule_id)
+        with self.lock:
+            self.schedules[schedule_id] = {
+                'id': schedule_id,
+                'trigger': str(trigger),
+                'priority': priority,
+                'query': getattr(args, 'query', None),
+                'urls': getattr(args, 'urls', None)
+            }
+            if not self.timer.running:
+                self.timer.start()
+        logging.info(f"Scheduled {schedule_id}: {trigger}")
+        return schedule_id
+
+    def unschedule(self, schedule_id):
+        with self.lock:
+            if self.schedules.pop(schedule_id, None) is None:
+                return False
+        self.timer.remove_job(schedule_id)
+        return True
+
+    def list_schedules(self):
+        with self.lock:
+            schedules = [dict(entry) for entry in self.schedules.values()]
+        for entry in schedules:
+            timer_job = self.timer.get_job(entry['id'])
+            next_run = timer_job.next_run_time if timer_job else None
+            entry['next_run'] = next_run.isoformat() if next_run else None
+        return schedules
+
+    def shutdown(self):
+        if self.timer.running:
+            self.timer.shutdown(wait=False)
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+
+def get_scheduler():
+    global scheduler
+    with scheduler_lock:
+        if scheduler is None:
+            with open('config.yaml') as f:
+                config = yaml.safe_load(f) or {}
+            scheduler = JobScheduler(
+                run_scraping_job,
+                capacity=config.get('service_capacity', os.cpu_count() or 4),
+                default_workers=config.get('workers', 1)
+            )
+            RESULTS.resize(config.get('results_buffer_size', 1000))
+        return scheduler
+
+def get_shared_queue():
+    # The web service's queue, leased from by remote workers through the /queue routes
+    global shared_queue
+    with scheduler_lock:
+        if shared_queue is None:
+            with open('config.yaml') as f:
+                config = yaml.safe_load(f) or {}
+            shared_queue = UrlQueue(
+                config.get('queue_path', 'queue.db'),
+                lease_seconds=config.get('queue_lease_seconds', 300),
+                max_attempts=config.get('queue_max_attempts', 3)
+            )
+        return shared_queue
+
+def run_scraping_job(args, job_status=None, cancel=None, job_id=None):
+    global proxy_manager
     scraper = None  
+    journal = None
+    url_queue = None
+    job_status = {} if job_status is None else job_status
     try:
-        scraping_status = {
+        job_status.update({
             "status": "running",
             "start_time": datetime.now().isoformat(),
             "urls_scraped": 0,
             "total_urls": 0,
             "errors": 0,
             "message": "Starting job"
-        }
+        })
         
-        scraper = CompanyScraper()
+        scraper = CompanyScraper(
+            workers=getattr(args, 'workers', None),
+            cache_ttl=getattr(args, 'cache_ttl', None),
+            use_cache=not getattr(args, 'no_cache', False),
+            proxy_manager=proxy_manager
+        )
+        proxy_manager = scraper.proxy_manager
+        if cancel is not None:
+            scraper.cancel_event = cancel
+
+        def update_progress(done, total=None):
+            job_status['urls_scraped'] = done
+            if total:
+                job_status['total_urls'] = total
+            job_status['errors'] = scraper.errors
+            job_status['fetch_stats'] = scraper.fetch_summary()
+            RESULTS.notify()
+        
+        resume_id = getattr(args, 'resume', None)
+        if scraper.journal_path:
+            journal = JobJournal(scraper.journal_path)
+        if resume_id:
+            saved = journal.load_job(resume_id) if journal else None
+            if saved is None:
+                raise Exception(f"Unknown job id: {resume_id}")
+            for key, value in saved.items():
+                setattr(args, key, value)
+            job_id = resume_id
+            journal.set_status(job_id, 'running')
+        elif journal:
+            job_id = journal.create_job(args, job_id)
+        if journal:
+            scraper.attach_journal(journal, job_id)
+            job_status['job_id'] = job_id
+            logging.info(f"Job {job_id} (resume with --resume {job_id})")
+        scraper.on_record = lambda record: RESULTS.append(record, job_id)
         
         if args.selectors:
             try:
-                scraper.cli_selectors = json.loads(args.selectors)
+                scraper.set_cli_selectors(json.loads(args.selectors))
             except json.JSONDecodeError:
                 logging.error("Invalid selector JSON format")
         
-        if args.query:
-            search_urls = scraper.get_search_results(args.query, args.pages)
+        job_status['output_path'] = scraper.open_sink(args.format, args.output)
+        if getattr(args, 'distributed', False):
+            # Worker processes (`--worker`) scrape; this process seeds the queue and writes the output
+            url_queue = scraper.open_queue()
+        
+        if resume_id and journal.has_plan(job_id):
+            scraper.replay_records(journal.records(job_id))
+            remaining = journal.remaining(job_id)
+            skipped = scraper.record_count
+            logging.info(f"Resuming job {job_id}: {skipped} done, {len(remaining)} to retry or scrape")
+            job_status['urls_scraped'] = skipped
+            job_status['total_urls'] = skipped + len(remaining)
+            on_progress = lambda done, total: update_progress(skipped + done, skipped + total)
+            if args.query and not journal.searched(job_id):
+                # The search was cut short: its pages are read again and the frontier skips what is known
+                scraper.scrape_search(args.query, args.pages, args.level, on_progress=on_progress,
+                                      limit=getattr(args, 'max_results', None), url_queue=url_queue,
+                                      urls=[url for url, _ in remaining], start_depths=dict(remaining))
+            elif url_queue is not None:
+                scraper.coordinate(url_queue, [url for url, _ in remaining], args.level, args.depth,
+                                   on_progress=on_progress)
+            else:
+                scraper.scrape_urls([url for url, _ in remaining], args.level, args.depth,
+                                    on_progress=on_progress, start_depths=dict(remaining))
+                                
+        elif args.query:
+            # Results are scraped as each search page comes in rather than after the last one
+            search_urls = scraper.scrape_search(args.query, args.pages, args.level, on_progress=update_progress,
+                                                limit=getattr(args, 'max_results', None), url_queue=url_queue)
             if not search_urls:
                 raise Exception("No search results found")
                 
-            scraping_status['total_urls'] = len(search_urls)
-            
-            for i, url in enumerate(search_urls):
-                scraper.scrape_page(url, args.level)
-                scraping_status['urls_scraped'] = i + 1
-                scraping_status['errors'] = scraper.errors
-                
         elif args.urls:
             urls = args.urls.split()
-            scraping_status['total_urls'] = len(urls)
+            job_status['total_urls'] = len(urls)
             
-            for i, url in enumerate(urls):
-                valid, clean_url = scraper.validate_url(url)
+            valid_urls = []
+            for url, (valid, clean_url) in zip(urls, scraper.validate_urls(urls)):
                 if valid:
-                    scraper.scrape_page(clean_url, args.level)
-                    if args.depth > 0:
-                        scraper.discover_urls(clean_url, args.depth)
+                    valid_urls.append(clean_url)
                 else:
                     logging.error(f"Invalid URL: {url}")
-                scraping_status['urls_scraped'] = i + 1
-                scraping_status['errors'] = scraper.errors
+                    job_status['urls_scraped'] += 1
+            skipped = job_status['urls_scraped']
+            on_progress = lambda done, total: update_progress(skipped + done, skipped + total)
+            if url_queue is not None:
+                scraper.coordinate(url_queue, valid_urls, args.level, args.depth, on_progress=on_progress)
+            else:
+                scraper.scrape_urls(valid_urls, args.level, args.depth, on_progress=on_progress)
         else:
             raise Exception("No input provided")
             
-        output_path = scraper.export_data(args.format, args.output)
-        scraping_status['status'] = "completed"
-        scraping_status['end_time'] = datetime.now().isoformat()
-        scraping_status['message'] = f"Scraped {len(scraper.data)} companies"
-        scraping_status['output_path'] = output_path
+        output_path = scraper.close_sink()
+        cancelled = scraper.cancel_event.is_set()
+        job_status['status'] = "cancelled" if cancelled else "completed"
+        job_status['end_time'] = datetime.now().isoformat()
+        job_status['message'] = f"Scraped {scraper.record_count} companies"
+        job_status['output_path'] = output_path
+        job_status['fetch_stats'] = scraper.fetch_summary()
+        job_status['metrics'] = scraper.metrics.summary()
+        logging.info(f"Fetch tiers: {job_status['fetch_stats']}")
+        for stage, timing in job_status['metrics']['stages'].items():
+            logging.info(f"Stage {stage}: {timing['count']} calls, {timing['total_seconds']}s total, "
+                         f"avg {timing['avg_seconds']}s, p99 <= {timing['p99_seconds']}s")
+        if journal:
+            journal.set_status(job_id, 'cancelled' if cancelled else 'completed')
         
     except Exception as e:  
         logging.error(f"Job failed: {str(e)}")
-        scraping_status['status'] = "failed"
-        scraping_status['message'] = str(e)
+        cancelled = scraper is not None and scraper.cancel_event.is_set()
+        job_status['status'] = "cancelled" if cancelled else "failed"
+        job_status['end_time'] = datetime.now().isoformat()
+        job_status['message'] = str(e)
+        if journal and job_id:
+            journal.set_status(job_id, job_status['status'])
     finally:
         if scraper:  
             scraper.close()
-        current_job = None
+        if journal:
+            journal.close()
+        if url_queue:
+            url_queue.close()
+        RESULTS.notify()
+    return job_status
+
+ROUTES = []
+_app = None
+_app_lock = threading.Lock()
+# Query parameters of the results API that are not field filters
+RESULT_PARAMS = ('offset', 'limit', 'q')
+MAX_RESULTS_PAGE = 500
+MAX_LEASE = 100
+STREAM_POLL = 1.0
+STREAM_KEEPALIVE = 15
 
-@app.route('/')
+def route(rule, **options):
+    # Views are collected here and registered when the app is first built, so Flask is
+    # only imported by processes that actually serve the dashboard
+    def register(view):
+        ROUTES.append((rule, view, options))
+        return view
+    return register
+
+def create_app():
+    from flask import Flask
+    configure_logging()
+    app = Flask(__name__, template_folder='templates')
+    for rule, view, options in ROUTES:
+        app.add_url_rule(rule, view_func=view, **options)
+    return app
+
+def get_app():
+    global _app
+    with _app_lock:
+        if _app is None:
+            _app = create_app()
+        return _app
+
+def __getattr__(name):
+    # `scraper.app` keeps working for WSGI servers pointed at the module
+    if name == 'app':
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@route('/')
 def dashboard():
+    from flask import render_template
     return render_template('dashboard.html')
 
-@app.route('/status')
+@route('/status')
 def status():
-    return jsonify(scraping_status)
+    from flask import jsonify
+    return jsonify(get_scheduler().status() or IDLE_STATUS)
+
+def job_results(job_status, limit=10):
+    output_file = (job_status or {}).get('output_path', 'output.jsonl')
+    try:
+        return tail_records(output_file, limit)
+    except Exception as e:
+        logging.warning(f"Could not read results tail: {str(e)}")
+    return []
+
+def int_param(value, name):
+    # Malformed paging and cursor parameters are the client's mistake, answered with a 400
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer, got {value!r}")
 
-@app.route('/results')
+def results_page(job_status):
+    # ?offset=&limit= page through the newest records first; ?q= matches any field and
+    # any other parameter filters on the field of that name, e.g. ?status=success
+    from flask import request
+    offset = max(0, int_param(request.args.get('offset', 0), 'offset'))
+    limit = max(1, min(int_param(request.args.get('limit', 10), 'limit'), MAX_RESULTS_PAGE))
+    text = request.args.get('q')
+    filters = {key: value for key, value in request.args.items() if key not in RESULT_PARAMS}
+    job_id = (job_status or {}).get('id')
+    page, total = RESULTS.query(job_id, filters, text, offset, limit)
+    records = [record for _, record in page]
+    if not total and job_status:
+        # Jobs finished before a restart, or pushed out of the buffer, are read back from their output
+        matches = [record for record in reversed(job_results(job_status, offset + limit))
+                   if record_matches(record, filters, text)]
+        records, total = matches[offset:offset + limit], len(matches)
+    return {
+        "records": records,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + limit if offset + limit < total else None,
+        "cursor": RESULTS.cursor
+    }
+
+def event_stream(job_id=None):
+    # Server-sent events: `status` whenever the job's status changes, `record` for each new
+    # record as it is stored. A reconnecting client resumes after Last-Event-ID.
+    from flask import request, Response
+    scheduler = get_scheduler()
+    if request.headers.get('Last-Event-ID'):
+        cursor = int_param(request.headers['Last-Event-ID'], 'Last-Event-ID')
+    elif request.args.get('since'):
+        cursor = int_param(request.args['since'], 'since')
+    else:
+        cursor = RESULTS.cursor
+
+    def events():
+        nonlocal cursor
+        version = RESULTS.version
+        sent = None
+        last_write = time.time()
+        while True:
+            job_status = scheduler.status(job_id) or IDLE_STATUS
+            payload = json.dumps(job_status, default=str)
+            if payload != sent:
+                sent = payload
+                last_write = time.time()
+                yield f"event: status\ndata: {payload}\n\n"
+            for seq, record in RESULTS.since(cursor, job_id):
+                cursor = seq
+                last_write = time.time()
+                yield f"id: {seq}\nevent: record\ndata: {json.dumps(record, default=str)}\n\n"
+            if job_id and job_status.get('status') in ('completed', 'failed', 'cancelled'):
+                return
+            if time.time() - last_write >= STREAM_KEEPALIVE:
+                last_write = time.time()
+                yield ": keep-alive\n\n"
+            version = RESULTS.wait(version, STREAM_POLL)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@route('/results')
 def results():
-    output_file = scraping_status.get('output_path', 'output.json')
-    if os.path.exists(output_file) and output_file.endswith('.json'):
-        try:
-            with open(output_file) as f:
-                data = json.load(f)
-                return jsonify(data[:10])
-        except:
-            pass
-    return jsonify([])
+    from flask import jsonify
+    try:
+        return jsonify(results_page(get_scheduler().status()))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@route('/stream')
+def stream():
+    from flask import jsonify
+    try:
+        return event_stream()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@route('/metrics')
+def metrics():
+    return METRICS.render(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
 
-@app.route('/start', methods=['POST'])
+@route('/proxies')
+def proxies():
+    from flask import jsonify
+    return jsonify(proxy_manager.snapshot() if proxy_manager else {})
+
+@route('/start', methods=['POST'])
 def start_job():
-    global current_job
-    if current_job and current_job.is_alive():
-        return jsonify({"status": "error", "message": "Job already running"})
-    
+    from flask import jsonify, request
     data = request.get_json()
     if not data:
         return jsonify({"status": "error", "message": "Invalid request"})
     
-    args = argparse.Namespace(
-        query=data.get('query', ''),
-        level=data.get('level', 'basic'),
-        pages=int(data.get('pages', 3)),
-        format='json',
-        output='output',
-        depth=0,
-        selectors=None,
-        urls=None
-    )
-    
-    current_job = threading.Thread(target=run_scraping_job, args=(args,))
-    current_job.daemon = True
-    current_job.start()
+    try:
+        args = argparse.Namespace(
+            query=data.get('query', ''),
+            level=data.get('level', 'basic'),
+            pages=int_param(data.get('pages', 3), 'pages'),
+            max_results=int_param(data['max_results'], 'max_results') if data.get('max_results') else None,
+            format=data.get('format', 'json'),
+            output='output',
+            depth=int_param(data.get('depth', 0), 'depth'),
+            selectors=None,
+            urls=data.get('urls'),
+            workers=int_param(data['workers'], 'workers') if data.get('workers') else None,
+            distributed=bool(data.get('distributed'))
+        )
+        priority = int_param(data.get('priority', 0), 'priority')
+        schedule = data.get('schedule')
+        if schedule:
+            schedule_id = get_scheduler().schedule(args, priority, cron=schedule.get('cron'),
+                                                   interval=schedule.get('interval'))
+            return jsonify({"status": "success", "message": "Job scheduled", "schedule_id": schedule_id})
+        job_id = get_scheduler().submit(args, priority)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     
-    return jsonify({"status": "success", "message": "Job started"})
+    return jsonify({"status": "success", "message": "Job queued", "job_id": job_id})
+
+@route('/jobs')
+def list_jobs():
+    from flask import jsonify
+    return jsonify(get_scheduler().list())
 
-@app.route('/health')
+@route('/jobs/<job_id>')
+def job_status(job_id):
+    from flask import jsonify
+    job = get_scheduler().status(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+    return jsonify(job)
+
+@route('/jobs/<job_id>/results')
+def job_results_view(job_id):
+    from flask import jsonify
+    job = get_scheduler().status(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+    try:
+        return jsonify(results_page(job))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@route('/jobs/<job_id>/stream')
+def job_stream(job_id):
+    from flask import jsonify
+    if get_scheduler().status(job_id) is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+    try:
+        return event_stream(job_id)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    from flask import jsonify
+    if not get_scheduler().cancel(job_id):
+        return jsonify({"status": "error", "message": "Job is not queued or running"}), 404
+    return jsonify({"status": "success", "message": "Job cancelled"})
+
+@route('/schedules')
+def list_schedules():
+    from flask import jsonify
+    return jsonify(get_scheduler().list_schedules())
+
+@route('/schedules/<schedule_id>', methods=['DELETE'])
+def delete_schedule(schedule_id):
+    from flask import jsonify
+    if not get_scheduler().unschedule(schedule_id):
+        return jsonify({"status": "error", "message": "Unknown schedule"}), 404
+    return jsonify({"status": "success", "message": "Schedule removed"})
+
+@route('/queue/lease', methods=['POST'])
+def queue_lease():
+    from flask import jsonify, request
+    data = request.get_json(silent=True) or {}
+    try:
+        count = int_param(data.get('count', 1), 'count')
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    if not 1 <= count <= MAX_LEASE:
+        return jsonify({"status": "error", "message": f"count must be between 1 and {MAX_LEASE}"}), 400
+    return jsonify(get_shared_queue().lease(data.get('worker'), count))
+
+@route('/queue/complete', methods=['POST'])
+def queue_complete():
+    from flask import jsonify, request
+    data = request.get_json(silent=True) or {}
+    if not data.get('job_id') or not data.get('url'):
+        return jsonify({"status": "error", "message": "job_id and url are required"}), 400
+    accepted = get_shared_queue().complete(data['job_id'], data['url'], data.get('record'), data.get('links'),
+                                           data.get('worker'))
+    return jsonify({"status": "success", "accepted": accepted})
+
+@route('/queue/idle', methods=['POST'])
+def queue_idle():
+    from flask import jsonify
+    return jsonify(get_shared_queue().idle())
+
+@route('/health')
 def health():
+    from flask import jsonify
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
@@ -612,28 +3729,48 @@ if __name__ == "__main__":
     input_group.add_argument('--urls', type=str, help='Seed URLs (space separated) for direct scraping')
     output_group.add_argument('--output', type=str, default='output', 
                             help='Base output filename (without extension)')
-    output_group.add_argument('--format', choices=['csv', 'json', 'sqlite'], 
+    output_group.add_argument('--format', choices=['csv', 'json', 'sqlite', 'parquet', 'arrow'], 
                             default='csv', help='Output file format')
     advanced_group.add_argument('--level', choices=['basic', 'medium', 'advanced'], 
                               default='basic', help='Data extraction depth level')
     advanced_group.add_argument('--pages', type=int, default=3, 
                               help='Number of search result pages to scrape')
+    advanced_group.add_argument('--max-results', type=int,
+                              help='Stop searching once this many result URLs were found')
     advanced_group.add_argument('--depth', type=int, default=0, 
                               help='URL discovery depth (0 for no discovery)')
     advanced_group.add_argument('--selectors', type=str, 
                               help='JSON string of custom CSS selectors')
+    advanced_group.add_argument('--workers', type=int,
+                              help='Number of parallel browser workers (defaults to config.yaml)')
+    advanced_group.add_argument('--cache-ttl', type=int,
+                              help='Seconds a cached page is reused before revalidation (defaults to config.yaml)')
+    advanced_group.add_argument('--no-cache', action='store_true',
+                              help='Bypass the on-disk response cache')
+    advanced_group.add_argument('--resume', type=str, metavar='JOB_ID',
+                              help='Resume a journaled job, skipping completed URLs and retrying failed ones')
     web_group.add_argument('--web', action='store_true', 
                          help='Start web dashboard')
     web_group.add_argument('--port', type=int, default=5001, 
                          help='Port for web dashboard')
     web_group.add_argument('--host', type=str, default='0.0.0.0',
                          help='Host to bind to')
+    distributed_group = parser.add_argument_group('Distributed Options')
+    distributed_group.add_argument('--distributed', action='store_true',
+                                 help='Coordinate the job: --worker processes scrape, this one writes the output')
+    distributed_group.add_argument('--worker', action='store_true',
+                                 help='Scrape URLs leased from distributed jobs until interrupted')
+    distributed_group.add_argument('--coordinator', type=str, metavar='URL',
+                                 help='Web service to lease from (defaults to queue_path in config.yaml)')
+    distributed_group.add_argument('--exit-when-idle', action='store_true',
+                                 help='Stop the worker once no distributed job has URLs left')
     parser.add_argument('--test', action='store_true', 
                       help='Run test suite only')
     parser.add_argument('--verbose', '-v', action='count', default=0,
                       help='Increase verbosity level')
     
     args = parser.parse_args()
+    configure_logging()
     
     if args.verbose == 1:
         logger.setLevel(logging.INFO)
@@ -641,8 +3778,11 @@ if __name__ == "__main__":
         logger.setLevel(logging.DEBUG)
     
     if args.web:
+        app = get_app()
+
         @app.route('/run', methods=['GET', 'POST'])
         def run_scraper():
+            from flask import jsonify, request
             if request.method == 'POST':
                 try:
                     run_scraping_job(args)
@@ -672,6 +3812,14 @@ if __name__ == "__main__":
                 exit(1)
             finally:
                 scraper.close()
+        elif args.worker:
+            scraper = CompanyScraper(workers=args.workers, cache_ttl=args.cache_ttl, use_cache=not args.no_cache)
+            url_queue = RemoteQueue(args.coordinator) if args.coordinator else scraper.open_queue()
+            try:
+                QueueWorker(scraper, url_queue).run(exit_when_idle=args.exit_when_idle)
+            finally:
+                url_queue.close()
+                scraper.close()
         else:
             try:
                 logging.info("Starting scraping job")
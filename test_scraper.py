@@ -1,9 +1,31 @@
+import os
+import argparse
+import json
+import sqlite3
+import tempfile
+import threading
+import time
 import unittest
-from scraper import CompanyScraper
+import yaml
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from scraper import (
+    CompanyScraper, BrowserPool, JobScheduler, BuiltWithClient, DomainRateLimiter, ExtractionPlan, PageDocument,
+    CrawlFrontier, JobJournal, Metrics, ProxyManager, QueueWorker, UrlQueue, RecordBuffer, RegexScanner, ResponseCache, SINKS, SqliteSink,
+    extract_page, find_phones, init_extraction_worker, looks_blocked, normalize_url, queue_lease, results, results_page, start_job,
+    stream, tail_records
+)
 
 class TestScraper(unittest.TestCase):
     def setUp(self):
-        self.scraper = CompanyScraper()
+        # A throwaway config, so the run leaves no cache or job journal in the tree
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        config_path = os.path.join(self.tmpdir.name, 'config.yaml')
+        with open(config_path, 'w') as f:
+            yaml.safe_dump({'cache_path': None, 'journal_path': None}, f)
+        self.scraper = CompanyScraper(config_path)
         
     def test_email_extraction(self):
         text = "Contact us at info@company.com or sales@company.com"
@@ -23,9 +45,914 @@ class TestScraper(unittest.TestCase):
         
         valid, url = self.scraper.validate_url("invalid-url")
         self.assertFalse(valid)
+
+    def test_performance_log_only_when_counting_blocked_requests(self):
+        options, _ = self.scraper.chrome_options(proxy="http://proxy:8080")
+        self.assertEqual(options.to_capabilities()['goog:loggingPrefs'], {'performance': 'ALL'})
+        self.scraper.blocked_patterns = []
+        options, _ = self.scraper.chrome_options(proxy="http://proxy:8080")
+        self.assertNotIn('goog:loggingPrefs', options.to_capabilities())
         
     def tearDown(self):
         self.scraper.close()
 
+class TestExtractionPlan(unittest.TestCase):
+    HTML = """<html><head><meta property="og:title" content="Acme Corp"></head>
+    <body><h1>Acme</h1><p>Write to sales@acme.com</p>
+    <a href="https://www.linkedin.com/company/acme">linkedin.com/company/acme</a></body></html>"""
+    
+    def test_css_xpath_and_regex_share_one_document(self):
+        plan = ExtractionPlan({
+            'company_name': ["h1", "meta[property='og:title']"],
+            'social': ["//a[contains(@href, 'linkedin.com')]/@href"],
+            'email': ["regex:[\\w\\.-]+@[\\w\\.-]+\\.[\\w]+"]
+        })
+        doc = PageDocument(self.HTML)
+        self.assertEqual(sorted(plan.select(doc, 'company_name').split(", ")), ["Acme", "Acme Corp"])
+        self.assertEqual(plan.select(doc, 'email'), "sales@acme.com")
+        fields = plan.extract(doc, 'medium')
+        self.assertEqual(fields['linkedin'], "https://www.linkedin.com/company/acme")
+        self.assertEqual(fields['email'], "sales@acme.com")
+        
+    def test_ready_xpath_unions_structural_selectors(self):
+        plan = ExtractionPlan({'company_name': ["h2", "//title", "regex:Acme"], 'email': ["regex:@"]})
+        xpath = plan.ready_xpath('company_name')
+        self.assertEqual(xpath.count("|"), 1)
+        self.assertFalse(PageDocument(self.HTML).root.xpath(xpath))
+        self.assertTrue(PageDocument("<html><body><h2>Acme</h2></body></html>").root.xpath(xpath))
+        self.assertIsNone(plan.ready_xpath('email'))
+        
+    def test_extraction_stage_runs_in_worker_processes(self):
+        selectors = {'company_name': ["h1"], 'social': ["a[href*='linkedin.com']"]}
+        with ProcessPoolExecutor(max_workers=1, initializer=init_extraction_worker,
+                                 initargs=(selectors, False, 10000)) as pool:
+            result = pool.submit(extract_page, self.HTML, "https://acme.com/about", 'medium', None, True).result()
+            shell = pool.submit(extract_page, "<html><body></body></html>", "https://acme.com", 'basic', 200).result()
+        self.assertEqual(result['fields']['name'], "Acme")
+        self.assertEqual(result['fields']['email'], "sales@acme.com")
+        self.assertEqual(result['links'], [])
+        self.assertTrue(shell['needs_browser'])
+
+class TestRegexScanner(unittest.TestCase):
+    PATTERNS = [('email', r'[\w.-]+@[\w.-]+\.\w+'), ('year', r'founded in (\d{4})'), ('phone', r'\d{3}-\d{4}')]
+    TEXT = "Founded in 1999. Mail ops@acme.io or call 555-1234."
+    
+    def test_fused_matches_separate(self):
+        fused = RegexScanner(self.PATTERNS, fuse=True).scan(self.TEXT.lower())
+        separate = RegexScanner(self.PATTERNS, fuse=False).scan(self.TEXT.lower())
+        self.assertEqual(fused, separate)
+        self.assertEqual(fused['year'], ["1999"])
+        
+    def test_backreferences_are_scanned_separately(self):
+        scanner = RegexScanner([('double', r'(\w)\1')], fuse=True)
+        self.assertIsNone(scanner.fused)
+        self.assertEqual(scanner.scan("aabc"), {'double': ["a"]})
+        
+    def test_input_is_bounded(self):
+        scanner = RegexScanner([('phone', r'\d{3}-\d{4}')], max_chars=10)
+        self.assertEqual(scanner.scan("555-1234 555-9876"), {'phone': ["555-1234"]})
+        
+    def test_phones_keep_full_number(self):
+        self.assertIn("123-456-7890", find_phones("Call 123-456-7890"))
+
+class TestNormalizeUrl(unittest.TestCase):
+    def test_equivalent_urls_share_a_key(self):
+        self.assertEqual(normalize_url("HTTPS://Example.com:443#team"), "https://example.com/")
+        self.assertEqual(normalize_url("example.com/about?x=1"), normalize_url("https://example.com/about?x=1"))
+        self.assertEqual(normalize_url("https://example.com/?b=2&a=1"), "https://example.com/?a=1&b=2")
+
+class TestCrawlFrontier(unittest.TestCase):
+    def test_dedups_canonical_urls(self):
+        frontier = CrawlFrontier()
+        self.assertTrue(frontier.add("https://example.com/team?b=2&a=1"))
+        self.assertFalse(frontier.add("https://EXAMPLE.com/team?a=1&b=2#people"))
+        self.assertEqual(len(frontier), 1)
+        
+    def test_breadth_first_order(self):
+        frontier = CrawlFrontier()
+        frontier.add("https://example.com/deep", 2)
+        frontier.add("https://example.com/", 0)
+        frontier.add("https://example.com/about", 1)
+        self.assertEqual([frontier.pop()[1] for _ in range(3)], [0, 1, 2])
+        
+    def test_per_domain_budget(self):
+        frontier = CrawlFrontier(max_pages_per_domain=2)
+        for page in range(5):
+            frontier.add(f"https://www.example.com/{page}", 1)
+        frontier.add("https://example.org/", 1)
+        self.assertEqual(len(frontier), 3)
+        
+    def test_seeds_are_not_budgeted(self):
+        frontier = CrawlFrontier(max_pages_per_domain=2)
+        for page in range(5):
+            frontier.add(f"https://example.com/seed{page}")
+        self.assertFalse(frontier.add("https://example.com/link", 1))
+        self.assertEqual(len(frontier), 5)
+
+class FakeDriver:
+    def __init__(self):
+        self.current_url = 'about:blank'
+        self.commands = []
+        
+    def get(self, url):
+        self.current_url = url
+        
+    def execute_cdp_cmd(self, command, params):
+        self.commands.append(command)
+        return {'metrics': [{'name': 'JSHeapTotalSize', 'value': 0}]}
+
+class TestBrowserPool(unittest.TestCase):
+    def setUp(self):
+        self.launched, self.quit = [], []
+        def launch(proxy, user_agent):
+            driver = FakeDriver()
+            self.pool.track(driver, proxy)
+            self.launched.append(driver)
+            return driver
+        def quit(driver):
+            self.pool.forget(driver)
+            self.quit.append(driver)
+        self.pool = BrowserPool(launch, quit, max_pages=2, warm_per_proxy=1)
+        
+    def test_rotation_reuses_warm_browsers(self):
+        first = self.pool.acquire('proxy-a')
+        second = self.pool.switch(first, 'proxy-b', 'agent')
+        back = self.pool.switch(second, 'proxy-a', 'agent')
+        self.assertIs(back, first)
+        self.assertEqual(len(self.launched), 2)
+        self.assertIn('Network.clearBrowserCookies', first.commands)
+        self.assertIn('Network.setUserAgentOverride', first.commands)
+        self.assertEqual(self.pool.proxy_of(back), 'proxy-a')
+        
+    def test_recycles_after_max_pages(self):
+        driver = self.pool.acquire('proxy-a')
+        self.assertIs(self.pool.page_done(driver), driver)
+        replacement = self.pool.page_done(driver)
+        self.assertIsNot(replacement, driver)
+        self.assertEqual(self.quit, [driver])
+        self.assertEqual(self.pool.proxy_of(replacement), 'proxy-a')
+        self.assertEqual(self.pool.stats['recycled'], 1)
+
+class TestProxyManager(unittest.TestCase):
+    def test_failing_proxy_is_quarantined_with_backoff(self):
+        manager = ProxyManager(['good', 'bad'], failure_threshold=2, backoff=60)
+        for _ in range(2):
+            manager.record('bad', False, 1.0)
+        self.assertTrue(all(manager.choose() == 'good' for _ in range(20)))
+        self.assertGreater(manager.snapshot()['bad']['quarantined_for'], 50)
+        manager.health['bad']['quarantined_until'] = 0
+        for _ in range(2):
+            manager.record('bad', True, blocked=True)
+        self.assertGreater(manager.snapshot()['bad']['quarantined_for'], 110)
+        self.assertEqual(manager.snapshot()['bad']['block_rate'], 0.5)
+        
+    def test_prefers_fast_healthy_proxies(self):
+        manager = ProxyManager(['fast', 'slow'])
+        for _ in range(10):
+            manager.record('fast', True, 0.1)
+            manager.record('slow', True, 5.0)
+        picks = [manager.choose() for _ in range(500)]
+        self.assertGreater(picks.count('fast'), picks.count('slow') * 3)
+        self.assertEqual(manager.snapshot()['slow']['p50_latency'], 5.0)
+        
+    def test_block_detection(self):
+        self.assertTrue(looks_blocked(429))
+        self.assertTrue(looks_blocked(200, "<title>Verify you are human</title>"))
+        self.assertFalse(looks_blocked(200, "<form><div class='g-recaptcha'></div></form>"))
+
+    def test_requests_proxies_cover_both_schemes(self):
+        manager = ProxyManager(['http://10.0.0.1:8080'])
+        self.assertEqual(manager.requests_proxies('http://10.0.0.1:8080'),
+                         {'http': 'http://10.0.0.1:8080', 'https': 'http://10.0.0.1:8080'})
+        self.assertIsNone(manager.requests_proxies(None))
+
+class TestMetrics(unittest.TestCase):
+    def test_histograms_and_counters_render_and_summarize(self):
+        parent = Metrics()
+        metrics = Metrics(parent=parent, buckets=(0.1, 1))
+        metrics.observe('scraper_stage_seconds', 0.05, stage='parse')
+        metrics.observe('scraper_stage_seconds', 0.5, stage='parse')
+        metrics.inc('scraper_errors_total', stage='fetch_http', category='timeout')
+        with metrics.timer('export'):
+            pass
+            
+        summary = metrics.summary()
+        self.assertEqual(summary['stages']['parse']['count'], 2)
+        self.assertEqual(summary['stages']['parse']['p50_seconds'], 0.1)
+        self.assertEqual(summary['stages']['parse']['p99_seconds'], 1)
+        self.assertEqual(summary['counters']['scraper_errors_total'], {'category=timeout,stage=fetch_http': 1})
+        
+        text = parent.render()
+        self.assertIn('scraper_stage_seconds_bucket{stage="parse",le="0.1"} 1', text)
+        self.assertIn('scraper_stage_seconds_bucket{stage="parse",le="+Inf"} 2', text)
+        self.assertIn('scraper_errors_total{category="timeout",stage="fetch_http"} 1', text)
+        self.assertIn('# TYPE scraper_stage_seconds histogram', text)
+
+    def test_samples_past_the_top_bucket_stay_valid_json(self):
+        metrics = Metrics(buckets=(0.1, 1))
+        metrics.observe('scraper_stage_seconds', 0.05, stage='fetch')
+        metrics.observe('scraper_stage_seconds', 90, stage='fetch')
+        stage = metrics.summary()['stages']['fetch']
+        self.assertEqual(stage['p99_seconds'], 1)
+        json.loads(json.dumps(metrics.summary(), allow_nan=False))
+        self.assertIn('scraper_stage_seconds_bucket{stage="fetch",le="1"} 1', metrics.render())
+        self.assertIn('scraper_stage_seconds_bucket{stage="fetch",le="+Inf"} 2', metrics.render())
+
+class TestRecordBuffer(unittest.TestCase):
+    def setUp(self):
+        self.buffer = RecordBuffer(capacity=5)
+        for i in range(7):
+            self.buffer.append({'url': f"https://site{i}.example/", 'status': 'success' if i % 2 else 'error: timeout'},
+                               job_id='a' if i < 4 else 'b')
+
+    def test_pages_newest_first_within_capacity(self):
+        page, total = self.buffer.query(offset=0, limit=2)
+        self.assertEqual(total, 5)
+        self.assertEqual([seq for seq, _ in page], [7, 6])
+        page, total = self.buffer.query(job_id='b', filters={'status': 'error'})
+        self.assertEqual([record['url'] for _, record in page], ["https://site6.example/", "https://site4.example/"])
+        self.assertEqual(self.buffer.query(text='SITE3')[1], 1)
+
+    def test_since_and_wait(self):
+        self.assertEqual([seq for seq, _ in self.buffer.since(4)], [5, 6, 7])
+        self.assertEqual([seq for seq, _ in self.buffer.since(0, job_id='a')], [3, 4])
+        version = self.buffer.version
+        threading.Timer(0.05, self.buffer.append, args=({'url': 'https://late.example/'},)).start()
+        self.assertNotEqual(self.buffer.wait(version, timeout=5), version)
+        self.assertEqual(self.buffer.since(7)[0][1]['url'], 'https://late.example/')
+
+class TestResultsApi(unittest.TestCase):
+    def setUp(self):
+        from flask import Flask
+        # A bare app: the helpers must not depend on the dashboard app having been built
+        self.app = Flask(__name__)
+
+    def test_results_page_before_the_app_is_built(self):
+        with self.app.test_request_context('/results?offset=2&limit=3'):
+            page = results_page(None)
+        self.assertEqual((page['offset'], page['limit']), (2, 3))
+
+    def test_malformed_parameters_are_rejected(self):
+        for path, headers, view in [('/results?offset=abc', {}, results), ('/results?limit=', {}, results),
+                                    ('/stream?since=x1', {}, stream), ('/stream', {'Last-Event-ID': 'abc'}, stream)]:
+            with self.app.test_request_context(path, headers=headers):
+                response, status = view()
+            self.assertEqual(status, 400)
+            self.assertEqual(response.get_json()['status'], 'error')
+
+    def test_start_rejects_malformed_numbers(self):
+        for body in ({'urls': "https://a.com", 'priority': "high"}, {'urls': "https://a.com", 'depth': None},
+                     {'query': "cloud", 'pages': "3x"}, {'query': "cloud", 'max_results': "ten"}):
+            with self.app.test_request_context('/start', method='POST', json=body):
+                response, status = start_job()
+            self.assertEqual(status, 400)
+            self.assertIn("must be an integer", response.get_json()['message'])
+
+    def test_lease_count_is_bounded(self):
+        for count in ("many", None, 0, -1, 10 ** 6):
+            with self.app.test_request_context('/queue/lease', method='POST', json={'worker': "w1", 'count': count}):
+                response, status = queue_lease()
+            self.assertEqual(status, 400)
+
+class TestDomainRateLimiter(unittest.TestCase):
+    def test_same_domain_is_spaced(self):
+        limiter = DomainRateLimiter(rate_limit=600, min_delay=0, max_delay=0)
+        self.assertEqual(limiter.reserve("example.com"), 0)
+        self.assertAlmostEqual(limiter.reserve("example.com"), 0.1, places=2)
+        
+    def test_domains_are_independent(self):
+        limiter = DomainRateLimiter(rate_limit=60, min_delay=1, max_delay=1)
+        limiter.reserve("example.com")
+        self.assertEqual(limiter.reserve("example.org"), 0)
+        
+    def test_release_spaces_from_completion(self):
+        limiter = DomainRateLimiter(rate_limit=0, min_delay=0.2, max_delay=0.2)
+        limiter.reserve("example.com")
+        time.sleep(0.1)
+        limiter.release("example.com")
+        self.assertGreater(limiter.reserve("example.com"), 0.15)
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(os.path.join(self.tmpdir.name, 'cache.db'), ttl=60, max_bytes=3000)
+        
+    def test_stores_validators(self):
+        self.cache.put("https://example.com/", "<html></html>", etag='"v1"')
+        entry = self.cache.get("https://example.com/")
+        self.assertEqual(entry['etag'], '"v1"')
+        self.assertTrue(self.cache.is_fresh(entry))
+        
+    def test_evicts_least_recently_used(self):
+        for i in range(3):
+            self.cache.put(f"https://example.com/{i}", "x" * 1000)
+            time.sleep(0.01)
+        self.cache.get("https://example.com/0")
+        self.cache.put("https://example.com/3", "x" * 1000)
+        self.assertIsNotNone(self.cache.get("https://example.com/0"))
+        self.assertIsNone(self.cache.get("https://example.com/1"))
+        
+    def tearDown(self):
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+class FakeBuiltWithHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+    
+    def do_GET(self):
+        lookups = parse_qs(urlparse(self.path).query)['LOOKUP'][0].split(',')
+        self.requests_seen.append(lookups)
+        body = json.dumps({
+            "Results": [
+                {
+                    "Lookup": domain,
+                    "Result": {"Paths": [{"Technologies": [{"Name": "nginx"}, {"Name": f"cms-{domain}"}]}]}
+                }
+                for domain in lookups
+            ],
+            "Errors": []
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body)
+        
+    def log_message(self, *args):
+        pass
+
+class TestBuiltWithClient(unittest.TestCase):
+    def setUp(self):
+        FakeBuiltWithHandler.requests_seen = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeBuiltWithHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(os.path.join(self.tmpdir.name, 'cache.db'))
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v19/api.json"
+        
+    def test_batch_lookup_and_dedup(self):
+        client = BuiltWithClient("key", base_url=self.base_url, cache=self.cache)
+        client.prefetch(["a.com", "b.com", "a.com"])
+        self.assertEqual(client.lookup("a.com").result(), "nginx, cms-a.com")
+        self.assertEqual(client.lookup("b.com").result(), "nginx, cms-b.com")
+        self.assertEqual(FakeBuiltWithHandler.requests_seen, [["a.com", "b.com"]])
+        client.close()
+        
+    def test_cached_across_runs(self):
+        first = BuiltWithClient("key", base_url=self.base_url, cache=self.cache)
+        first.lookup("a.com").result()
+        first.close()
+        second = BuiltWithClient("key", base_url=self.base_url, cache=self.cache)
+        self.assertEqual(second.lookup("a.com").result(), "nginx, cms-a.com")
+        self.assertEqual(len(FakeBuiltWithHandler.requests_seen), 1)
+        second.close()
+        
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+class FakeSiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = (f"<html><head><title>Acme {self.path}</title></head><body><h1>Acme</h1><p>"
+                + "Acme builds reliable software for teams. " * 10 + "</p></body></html>").encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def log_message(self, *args):
+        pass
+
+class LocalSiteTestCase(unittest.TestCase):
+    # Serves `handler` on a local port and builds scrapers that crawl it without delays, cache or journal
+    handler = FakeSiteHandler
+    SCRAPER_CONFIG = {'fetch_mode': 'http', 'rate_limit': 0, 'min_delay': 0, 'max_delay': 0,
+                      'extraction_processes': 0, 'cache_path': None, 'journal_path': None}
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def make_scraper(self, workers=None, cache_ttl=None, **overrides):
+        config_path = os.path.join(self.tmpdir.name, 'config.yaml')
+        with open(config_path, 'w') as f:
+            yaml.safe_dump({**self.SCRAPER_CONFIG, **overrides}, f)
+        scraper = CompanyScraper(config_path, workers=workers, cache_ttl=cache_ttl)
+        self.addCleanup(scraper.close)
+        return scraper
+
+class TestSearchFeed(LocalSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.scraper = self.make_scraper()
+
+    def test_fed_urls_are_scraped_before_the_feed_ends(self):
+        def feed():
+            yield [f"{self.base_url}/a", f"{self.base_url}/b"]
+            # The next results page only arrives once the first page's URLs are being scraped
+            deadline = time.time() + 10
+            while self.scraper.record_count == 0 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertGreater(self.scraper.record_count, 0)
+            yield [f"{self.base_url}/b", f"{self.base_url}/c"]
+
+        self.scraper.scrape_urls([], feed=feed())
+        self.assertEqual(sorted(record['url'] for record in self.scraper.data),
+                         [f"{self.base_url}/a", f"{self.base_url}/b", f"{self.base_url}/c"])
+
+class SlowExtractor:
+    # A one-thread stand-in for the extraction process pool that falls behind the fetchers
+    def __init__(self):
+        self.pool = ThreadPoolExecutor(max_workers=1)
+
+    def submit(self, func, *args):
+        def slow():
+            time.sleep(0.02)
+            return func(*args)
+        return self.pool.submit(slow)
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+class TestExtractionQueue(LocalSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.urls = [f"{self.base_url}/{page}" for page in range(24)]
+
+    def crawl(self, queue_size):
+        # Returns how many fetched pages were waiting for extraction at most
+        scraper = self.make_scraper(extraction_processes=1, max_concurrency=4)
+        scraper.extraction_queue_size = queue_size
+        init_extraction_worker(scraper.selectors, scraper.fuse_regex, scraper.max_scan_chars)
+        scraper.start_extractor = SlowExtractor
+        fetch_source, backlog = scraper.fetch_source, []
+        def counted(url):
+            result = fetch_source(url)
+            with scraper.lock:
+                backlog.append(len(backlog) + 1 - scraper.record_count)
+            return result
+        scraper.fetch_source = counted
+        scraper.scrape_urls(self.urls)
+        self.assertEqual(sorted(record['url'] for record in scraper.data), sorted(self.urls))
+        return max(backlog)
+
+    def test_fetchers_wait_for_a_full_queue(self):
+        # Queued pages, plus one held by each extractor and each fetcher waiting to queue
+        self.assertLessEqual(self.crawl(1), 1 + 2 + 4)
+        self.assertGreater(self.crawl(32), 1 + 2 + 4)
+
+class FakeTieredSiteHandler(FakeSiteHandler):
+    # A script-only shell, a missing page and an anti-bot block next to ordinary pages
+    def do_GET(self):
+        if self.path == '/shell':
+            body = b"<html><body><div id='root'></div><noscript>Please enable JavaScript</noscript></body></html>"
+        elif self.path == '/cafe':
+            # UTF-8 declared only in the page, not in the Content-Type header
+            body = ("<html><head><meta charset='utf-8'><title>Caf\u00e9 M\u00fcller GmbH</title></head><body>"
+                    "<h1>Caf\u00e9 M\u00fcller GmbH</h1><p>" + "Kaffee und Kuchen aus M\u00fcnchen. " * 10
+                    + "</p></body></html>").encode('utf-8')
+        elif self.path in ('/missing', '/blocked'):
+            self.send_response(404 if self.path == '/missing' else 403)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        else:
+            return super().do_GET()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class TestFetchTiers(LocalSiteTestCase):
+    handler = FakeTieredSiteHandler
+
+    def setUp(self):
+        super().setUp()
+        self.scraper = self.make_scraper(fetch_mode='auto')
+        self.browser_loads = []
+        def fetch_browser(url):
+            self.browser_loads.append(url)
+            return "<html><body><h1>Rendered</h1><p>" + "Rendered by the browser. " * 20 + "</p></body></html>"
+        self.scraper.fetch_browser = fetch_browser
+
+    def scrape(self, *paths):
+        self.scraper.scrape_urls([f"{self.base_url}{path}" for path in paths])
+        return {record['url'][len(self.base_url):]: record['status'] for record in self.scraper.data}
+
+    def test_auto_escalates_only_script_shells_and_blocks(self):
+        statuses = self.scrape('/', '/shell', '/missing', '/blocked')
+        self.assertEqual(sorted(self.browser_loads), [f"{self.base_url}/blocked", f"{self.base_url}/shell"])
+        self.assertEqual(statuses['/'], 'success')
+        self.assertEqual(statuses['/shell'], 'success')
+        self.assertEqual(statuses['/blocked'], 'success')
+        self.assertEqual(statuses['/missing'], 'error: HTTP 404')
+        self.assertEqual(self.scraper.fetch_stats['escalated'], 2)
+        self.assertEqual(self.scraper.fetch_summary()['http']['count'], 4)
+
+    def test_meta_charset_decodes_pages_without_a_header_charset(self):
+        html, tier, _ = self.scraper.fetch_source(f"{self.base_url}/cafe")
+        self.assertEqual(tier, 'http')
+        self.assertIn("Caf\u00e9 M\u00fcller GmbH", html)
+        _, doc, _ = self.scraper.fetch_page(f"{self.base_url}/cafe")
+        self.assertEqual(doc.root.xpath('string(//h1)'), "Caf\u00e9 M\u00fcller GmbH")
+
+    def test_http_mode_never_launches_a_browser(self):
+        self.scraper.fetch_mode = 'http'
+        statuses = self.scrape('/', '/shell', '/missing', '/blocked')
+        self.assertEqual(self.browser_loads, [])
+        self.assertEqual(self.scraper.fetch_stats['escalated'], 0)
+        self.assertEqual(statuses['/shell'], 'success')
+        self.assertEqual(statuses['/missing'], 'error: HTTP 404')
+        self.assertEqual(statuses['/blocked'], 'error: HTTP 403: blocked')
+        self.assertEqual(self.scraper.errors, 2)
+
+class FakeValidatingHandler(FakeSiteHandler):
+    # Answers a matching If-None-Match with 304 and no body
+    conditional = []
+
+    def do_GET(self):
+        self.conditional.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('ETag', '"v1"')
+            self.end_headers()
+            return
+        body = b"<html><body><h1>Acme</h1><p>" + b"Acme builds reliable software for teams. " * 10 + b"</p></body></html>"
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class TestConditionalGet(LocalSiteTestCase):
+    handler = FakeValidatingHandler
+
+    def setUp(self):
+        FakeValidatingHandler.conditional = []
+        super().setUp()
+        self.cache_path = os.path.join(self.tmpdir.name, 'cache.db')
+        # Nothing is fresh, so every repeat fetch revalidates
+        self.scraper = self.make_scraper(cache_ttl=0, cache_path=self.cache_path)
+        self.url = f"{self.base_url}/"
+
+    def test_not_modified_reuses_the_cached_body(self):
+        html, _, tier = self.scraper.fetch_page(self.url)
+        self.assertEqual(tier, 'http')
+        cached, doc, tier = self.scraper.fetch_page(self.url)
+        self.assertEqual(FakeValidatingHandler.conditional, [None, '"v1"'])
+        self.assertEqual(tier, 'cache')
+        self.assertEqual(cached, html)
+        self.assertEqual(doc.root.xpath('string(//h1)'), "Acme")
+        self.assertEqual(self.scraper.fetch_stats['cache'], {'hits': 0, 'revalidated': 1})
+
+    def test_fresh_cache_hits_skip_the_politeness_delay(self):
+        urls = [f"{self.url}page{i}" for i in range(3)]
+        timings = []
+        for _ in range(2):
+            scraper = self.make_scraper(cache_ttl=3600, cache_path=self.cache_path, min_delay=0.3, max_delay=0.3)
+            started = time.perf_counter()
+            scraper.scrape_urls(urls)
+            timings.append(time.perf_counter() - started)
+        self.assertGreaterEqual(timings[0], 0.6)
+        self.assertLess(timings[1], 0.3)
+        self.assertEqual(scraper.fetch_stats['cache']['hits'], 3)
+
+class CountingSiteHandler(FakeTieredSiteHandler):
+    hits = []
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        super().do_GET()
+
+class TestConcurrentScrape(LocalSiteTestCase):
+    handler = CountingSiteHandler
+
+    def setUp(self):
+        CountingSiteHandler.hits = []
+        super().setUp()
+        self.scraper = self.make_scraper(workers=4, max_concurrency=8)
+
+    def test_each_url_is_scraped_once_across_workers(self):
+        # Two host names for the one server are two domains, so fetches really overlap
+        hosts = [self.base_url, f"http://localhost:{self.server.server_port}"]
+        pages = [f"{hosts[i % 2]}/page{i}" for i in range(30)]
+        # Repeats and spellings of the same URL, plus one page that is missing
+        urls = pages + pages[:10] + [url + "#top" for url in pages[10:15]] + [f"{self.base_url}/missing"]
+        self.scraper.scrape_urls(urls)
+        self.assertEqual(sorted(CountingSiteHandler.hits), sorted([f"/page{i}" for i in range(30)] + ["/missing"]))
+        self.assertEqual(len(self.scraper.data), 31)
+        self.assertEqual(len(self.scraper.visited_urls), 31)
+        self.assertEqual(self.scraper.record_count, 31)
+        self.assertEqual(self.scraper.errors, 1)
+        self.assertEqual(sorted(record['url'] for record in self.scraper.data if record['status'] == 'success'), sorted(pages))
+
+class FakeSearchHandler(FakeSiteHandler):
+    # Results pages overlap by half, like a real engine's, and point back at this server's sites
+    searches = []
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        if parsed.path not in ('/search', '/api/search'):
+            return super().do_GET()
+        self.searches.append(self.path)
+        start = int(params.get('first', params.get('offset', ['0']))[0]) // 2
+        host = f"http://127.0.0.1:{self.server.server_port}"
+        urls = [f"{host}/site{i}" for i in range(start, start + 10)]
+        if parsed.path == '/search':
+            items = "".join(f'<li class="b_algo"><h2><a href="{url}">Site</a></h2></li>' for url in urls)
+            body, content_type = f'<ol id="b_results">{items}</ol>', 'text/html'
+        else:
+            body, content_type = json.dumps({'webPages': {'value': [{'url': url} for url in urls]}}), 'application/json'
+        body = body.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class TestSearchBackends(LocalSiteTestCase):
+    handler = FakeSearchHandler
+
+    def setUp(self):
+        FakeSearchHandler.searches = []
+        super().setUp()
+
+    def search_scraper(self, backend):
+        return self.make_scraper(
+            search_backend=backend,
+            search_url=self.base_url + '/search?q={query}&first={start}',
+            search_api_url=self.base_url + '/api/search?q={query}&offset={start}&count={count}',
+            cache_path=os.path.join(self.tmpdir.name, 'cache.db'))
+
+    def test_http_and_api_backends_dedup_and_stop_at_limit(self):
+        for backend in ('http', 'api'):
+            FakeSearchHandler.searches = []
+            batches = list(self.search_scraper(backend).iter_search_pages("cloud startups", pages=3, limit=12))
+            self.assertEqual([len(batch) for batch in batches], [10, 2])
+            self.assertEqual(batches[1], [f"{self.base_url}/site10", f"{self.base_url}/site11"])
+            self.assertEqual(len(FakeSearchHandler.searches), 2)
+
+    def test_repeated_query_is_served_from_cache(self):
+        first = self.search_scraper('http').get_search_results("Cloud  Startups", pages=2)
+        FakeSearchHandler.searches = []
+        second = self.search_scraper('http').get_search_results("cloud startups", pages=2)
+        self.assertEqual(first, second)
+        self.assertEqual(FakeSearchHandler.searches, [])
+
+    def test_resumed_job_finishes_an_interrupted_search(self):
+        journal = JobJournal(os.path.join(self.tmpdir.name, 'jobs.db'))
+        self.addCleanup(journal.close)
+        job_id = journal.create_job(argparse.Namespace(query="cloud startups", pages=2, level='basic', depth=0))
+        # The job died after journaling the first results page and scraping one of its sites
+        first_page = [f"{self.base_url}/site{i}" for i in range(10)]
+        journal.plan(job_id, first_page)
+        journal.complete(job_id, {'url': first_page[0], 'status': 'success'})
+        self.assertFalse(journal.searched(job_id))
+
+        scraper = self.search_scraper('http')
+        scraper.attach_journal(journal, job_id)
+        scraper.replay_records(journal.records(job_id))
+        remaining = journal.remaining(job_id)
+        scraper.scrape_search("cloud startups", pages=2, urls=[url for url, _ in remaining], start_depths=dict(remaining))
+        self.assertTrue(journal.searched(job_id))
+        self.assertEqual(sorted(record['url'] for record in scraper.data),
+                         sorted(f"{self.base_url}/site{i}" for i in range(15)))
+        self.assertEqual(journal.remaining(job_id), [])
+
+class TestRecordSinks(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        
+    def test_streaming_and_tail(self):
+        for format, sink_class in SINKS.items():
+            sink = sink_class(os.path.join(self.tmpdir.name, format), batch_size=3)
+            for i in range(4):
+                sink.write({'url': f"https://example{i}.com", 'name': f"Example\n{i}", 'status': 'success'})
+            if format not in ('parquet', 'arrow'):
+                # Columnar footers are only written on close
+                self.assertEqual(len(tail_records(sink.path, 10)), 3, format)
+            sink.close()
+            tail = tail_records(sink.path, 2)
+            self.assertEqual([record['url'] for record in tail],
+                             ["https://example2.com", "https://example3.com"], format)
+            
+    def test_columnar_schema_is_typed(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        sink = SINKS['parquet'](os.path.join(self.tmpdir.name, 'companies'), batch_size=2)
+        for i in range(5):
+            sink.write({'url': f"https://example{i}.com", 'email': "a@example.com, b@example.com",
+                        'tech_stack': "", 'scrape_time': "2025-07-13T02:15:00.080414", 'status': 'success'})
+        sink.close()
+        reader = pq.ParquetFile(sink.path)
+        self.assertEqual(reader.num_row_groups, 3)
+        self.assertTrue(pa.types.is_list(reader.schema_arrow.field('email').type))
+        self.assertTrue(pa.types.is_timestamp(reader.schema_arrow.field('scrape_time').type))
+        record = tail_records(sink.path, 1)[0]
+        self.assertEqual(record['email'], ["a@example.com", "b@example.com"])
+        self.assertEqual(record['tech_stack'], [])
+        
+    def test_sqlite_upserts_and_keeps_history(self):
+        filename = os.path.join(self.tmpdir.name, 'companies')
+        legacy = sqlite3.connect(f"{filename}.db")
+        legacy.execute("CREATE TABLE companies (url TEXT, name TEXT, phone TEXT, scrape_time TEXT, status TEXT)")
+        legacy.execute("INSERT INTO companies VALUES ('https://acme.com', 'Acme', '555-0100', '2025-01-01', 'success')")
+        legacy.commit()
+        legacy.close()
+        
+        sink = SqliteSink(filename)
+        sink.write({'url': "https://acme.com/", 'name': "Acme Inc", 'phone': "555-0100",
+                    'scrape_time': '2025-02-01', 'status': 'success'})
+        sink.write({'url': "https://globex.com", 'name': "Globex", 'scrape_time': '2025-02-01', 'status': 'success'})
+        sink.close()
+        sink = SqliteSink(filename)
+        sink.write({'url': "https://globex.com", 'scrape_time': '2025-03-01', 'status': 'error: timeout'})
+        sink.close()
+        
+        conn = sqlite3.connect(f"{filename}.db")
+        rows = dict(conn.execute("SELECT canonical_url, name FROM companies").fetchall())
+        history = conn.execute("SELECT field, old_value, new_value FROM companies_history").fetchall()
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(companies)")}
+        conn.close()
+        self.assertEqual(rows, {"https://acme.com/": "Acme Inc", "https://globex.com/": "Globex"})
+        self.assertEqual(history, [('name', 'Acme', 'Acme Inc')])
+        self.assertTrue({'idx_companies_website', 'idx_companies_scrape_time'} <= indexes)
+            
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+class TestJobJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.journal = JobJournal(os.path.join(self.tmpdir.name, 'jobs.db'))
+        
+    def test_resume_skips_done_and_retries_failed(self):
+        args = argparse.Namespace(query=None, urls="https://a.com https://b.com", level='basic', depth=1)
+        job_id = self.journal.create_job(args)
+        self.journal.plan(job_id, ["https://a.com", "https://b.com", "https://c.com"])
+        self.journal.complete(job_id, {'url': "https://a.com", 'status': 'success'})
+        self.journal.complete(job_id, {'url': "https://b.com", 'status': 'error: timeout'})
+        
+        self.assertEqual(self.journal.load_job(job_id)['urls'], "https://a.com https://b.com")
+        self.assertEqual([record['url'] for record in self.journal.records(job_id)], ["https://a.com"])
+        self.assertEqual(sorted(url for url, _ in self.journal.remaining(job_id)), ["https://b.com", "https://c.com"])
+        
+    def tearDown(self):
+        self.journal.close()
+        self.tmpdir.cleanup()
+
+class TestUrlQueue(LocalSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.queue = UrlQueue(os.path.join(self.tmpdir.name, 'queue.db'), lease_seconds=60, max_attempts=2)
+        self.queue.create_job('job', level='medium', depth=1, max_pages_per_domain=3)
+        self.addCleanup(self.queue.close)
+
+    def test_dedup_budget_and_links(self):
+        self.assertEqual(self.queue.add('job', ["https://a.com/", "https://A.com", "https://b.com/"]), 2)
+        leases = self.queue.lease('w1', count=5)
+        self.assertEqual([lease['url'] for lease in leases], ["https://a.com/", "https://b.com/"])
+        self.assertEqual(leases[0]['level'], 'medium')
+        self.assertEqual(self.queue.lease('w2'), [])
+
+        links = ["https://a.com/1", "https://a.com/2", "https://a.com/3"]
+        self.assertTrue(self.queue.complete('job', "https://a.com/", {'url': "https://a.com/"}, links, 'w1'))
+        self.assertFalse(self.queue.complete('job', "https://a.com/", {'url': "https://a.com/"}, links, 'w2'))
+        child = self.queue.lease('w1', count=5)
+        self.assertEqual([lease['url'] for lease in child], ["https://a.com/1", "https://a.com/2"])
+        self.queue.complete('job', "https://a.com/1", None, ["https://b.com/deeper"], 'w1')
+        self.assertEqual(self.queue.counts('job'), {'pending': 0, 'leased': 2, 'done': 2, 'failed': 0})
+        self.assertEqual([record['url'] for _, record in self.queue.records('job')], ["https://a.com/"])
+
+    def test_expired_leases_are_retried_then_abandoned(self):
+        self.queue.lease_seconds = 0
+        self.queue.add('job', ["https://a.com/"])
+        self.assertEqual(len(self.queue.lease('crashed')), 1)
+        self.assertEqual(len(self.queue.lease('crashed-again')), 1)
+        self.assertEqual(self.queue.lease('w3'), [])
+        self.assertEqual(self.queue.counts('job')['failed'], 1)
+        self.assertTrue(self.queue.idle())
+
+    def test_workers_scrape_what_the_coordinator_queues(self):
+        queue_config = {'queue_path': os.path.join(self.tmpdir.name, 'queue.db'), 'queue_poll_interval': 0.05}
+        coordinator, worker = self.make_scraper(**queue_config), self.make_scraper(workers=2, **queue_config)
+        urls = [f"{self.base_url}/{page}" for page in ('a', 'b', 'c')]
+
+        url_queue = coordinator.open_queue()
+        self.addCleanup(url_queue.close)
+        thread = threading.Thread(target=coordinator.coordinate, args=(url_queue, urls))
+        thread.start()
+        time.sleep(0.2)
+        worker_queue = worker.open_queue()
+        self.addCleanup(worker_queue.close)
+        QueueWorker(worker, worker_queue).run(exit_when_idle=True)
+        thread.join(10)
+        self.assertEqual(sorted(record['url'] for record in coordinator.data), urls)
+        self.assertEqual(worker.data, [])
+
+    def test_resumed_coordinator_journals_links_and_retries_errors(self):
+        queue_config = {'queue_path': os.path.join(self.tmpdir.name, 'queue.db'), 'queue_poll_interval': 0.05}
+        a, b, c = (f"{self.base_url}/{page}" for page in ('a', 'b', 'c'))
+        journal = JobJournal(os.path.join(self.tmpdir.name, 'jobs.db'))
+        self.addCleanup(journal.close)
+        # The first coordinator journaled the seeds and /a, then died; workers went on to find /c
+        # and report /b as failed
+        self.queue.create_job('crawl', depth=1)
+        self.queue.add('crawl', [a, b])
+        self.queue.complete('crawl', a, {'url': a, 'status': 'success'}, [c])
+        self.queue.complete('crawl', b, {'url': b, 'status': 'error: timeout'})
+        journal.plan('crawl', [a, b])
+        journal.complete('crawl', {'url': a, 'status': 'success'})
+
+        coordinator, worker = self.make_scraper(**queue_config), self.make_scraper(**queue_config)
+        coordinator.attach_journal(journal, 'crawl')
+        coordinator.replay_records(journal.records('crawl'))
+        remaining = [url for url, _ in journal.remaining('crawl')]
+        thread = threading.Thread(target=coordinator.coordinate, args=(self.queue, remaining, 'basic', 1))
+        thread.start()
+        time.sleep(0.2)
+        worker_queue = worker.open_queue()
+        self.addCleanup(worker_queue.close)
+        QueueWorker(worker, worker_queue).run(exit_when_idle=True)
+        thread.join(10)
+        self.assertEqual(sorted((record['url'], record['status']) for record in coordinator.data),
+                         [(a, 'success'), (b, 'success'), (c, 'success')])
+        self.assertEqual(journal.remaining('crawl'), [])
+        self.assertEqual(sorted(record['url'] for record in journal.records('crawl')), [a, b, c])
+
+    def test_domain_budget_is_kept_across_batches(self):
+        for page in range(5):
+            self.queue.add('job', [f"https://a.com/{page}", f"https://b.com/{page}"], depth=1)
+        self.assertEqual(self.queue.counts('job')['pending'], 6)
+        # Seeds are not budgeted
+        self.assertEqual(self.queue.add('job', ["https://a.com/seed"]), 1)
+
+class TestJobScheduler(unittest.TestCase):
+    def setUp(self):
+        self.started = []
+        self.release = threading.Event()
+        self.scheduler = JobScheduler(self.fake_run, capacity=2)
+        
+    def fake_run(self, args, job_status=None, cancel=None, job_id=None):
+        job_status['status'] = 'running'
+        self.started.append(args.query)
+        while not self.release.is_set() and not cancel.is_set():
+            time.sleep(0.01)
+        job_status['status'] = 'cancelled' if cancel.is_set() else 'completed'
+        
+    def submit(self, query, priority=0, workers=1):
+        return self.scheduler.submit(argparse.Namespace(query=query, workers=workers, output='output'), priority)
+        
+    def wait_for(self, condition):
+        deadline = time.time() + 5
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+        
+    def test_capacity_is_shared_and_priority_orders_the_queue(self):
+        self.submit('a', workers=2)
+        low = self.submit('low')
+        high = self.submit('high', priority=5)
+        self.wait_for(lambda: self.started == ['a'])
+        self.assertEqual(self.scheduler.status(low)['status'], 'queued')
+        self.release.set()
+        self.wait_for(lambda: len(self.started) == 3)
+        self.assertEqual(self.started[1:], ['high', 'low'])
+        self.assertTrue(self.scheduler.status(high)['id'] == high)
+        
+    def test_cancel_queued_and_running_jobs(self):
+        running = self.submit('a', workers=2)
+        queued = self.submit('b')
+        self.wait_for(lambda: self.started == ['a'])
+        self.assertTrue(self.scheduler.cancel(queued))
+        self.assertTrue(self.scheduler.cancel(running))
+        self.wait_for(lambda: self.scheduler.status(running)['status'] == 'cancelled')
+        self.assertEqual(self.scheduler.status(queued)['status'], 'cancelled')
+        self.assertEqual(self.started, ['a'])
+        
+    def test_recurring_schedule_submits_jobs(self):
+        self.release.set()
+        schedule_id = self.scheduler.schedule(argparse.Namespace(query='q', output='output'), interval=0.1)
+        self.wait_for(lambda: len(self.started) >= 2)
+        self.assertTrue(self.scheduler.unschedule(schedule_id))
+        self.assertEqual({job['schedule_id'] for job in self.scheduler.list()}, {schedule_id})
+        
+    def tearDown(self):
+        self.release.set()
+        self.scheduler.shutdown()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file